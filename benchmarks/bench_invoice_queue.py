@@ -0,0 +1,72 @@
+"""
+Checkout latency with and without the background invoice worker.
+
+The Complete Sale handler's invoice step either renders the PDF inline (the old behaviour)
+or hands the HTML to InvoiceQueue and returns. Both variants build the same HTML for the
+same carts; the "checkout" time is what the cashier waits for, "drain" is how long the
+worker pool takes to finish all queued PDFs.
+
+    python benchmarks/bench_invoice_queue.py --sales 50 --items 20 --workers 2
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchlib import make_cart, summarize
+from kirana_invoice import InvoiceQueue, build_invoice_html, render_invoice_pdf
+
+
+def bench_inline(invoice_dir, sales, cart):
+    latencies = []
+    for sale_id in range(sales):
+        start = time.perf_counter()
+        html = build_invoice_html(sale_id, cart, 1000.0, 0.0)
+        render_invoice_pdf(html, os.path.join(invoice_dir, f"invoice_{sale_id}.pdf"))
+        latencies.append(time.perf_counter() - start)
+    return {"checkout": summarize(latencies)}
+
+
+def bench_queued(invoice_dir, sales, cart, workers):
+    queue = InvoiceQueue(invoice_dir, workers=workers, max_pending=sales)
+    latencies = []
+    started = time.perf_counter()
+    for sale_id in range(sales):
+        start = time.perf_counter()
+        queue.submit(sale_id, build_invoice_html(sale_id, cart, 1000.0, 0.0))
+        latencies.append(time.perf_counter() - start)
+    for sale_id in range(sales):
+        queue.wait(sale_id)
+    drain = time.perf_counter() - started
+    queue.executor.shutdown()
+    return {"checkout": summarize(latencies), "drain_s": round(drain, 3)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sales", type=int, default=50)
+    parser.add_argument("--items", type=int, default=20, help="line items per cart")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--out", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    cart = make_cart(args.items)
+    with tempfile.TemporaryDirectory() as inline_dir, tempfile.TemporaryDirectory() as queued_dir:
+        results = {
+            "params": vars(args),
+            "inline": bench_inline(inline_dir, args.sales, cart),
+            "queued": bench_queued(queued_dir, args.sales, cart, args.workers),
+        }
+
+    print(json.dumps(results, indent=2))
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
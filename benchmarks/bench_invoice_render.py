@@ -0,0 +1,70 @@
+"""
+Per-invoice build/render time and peak allocations by cart size.
+
+"build" is HTML generation only, "render" is build plus WeasyPrint PDF output to memory
+with the shared stylesheet and font configuration. Peak allocations come from tracemalloc
+on a separate pass so they do not skew the timings.
+
+    python benchmarks/bench_invoice_render.py --items 10 100 500 --repeat 5
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from io import BytesIO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchlib import make_cart
+from kirana_invoice import build_invoice_html, render_invoice_pdf
+
+
+def timed(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return round(statistics.median(times) * 1000, 2)
+
+
+def peak_kib(fn):
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return round(peak / 1024, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, nargs="+", default=[10, 100, 500], help="cart sizes")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--out", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    render_invoice_pdf(build_invoice_html(0, make_cart(1), 0, 0), BytesIO())  # warm up shared resources
+    results = {"params": vars(args), "carts": []}
+    for n_items in args.items:
+        cart = make_cart(n_items)
+        build = lambda: build_invoice_html(1, cart, 1000.0, 0.0)
+        render = lambda: render_invoice_pdf(build(), BytesIO())
+        results["carts"].append({
+            "items": n_items,
+            "build_ms": timed(build, args.repeat),
+            "build_peak_kib": peak_kib(build),
+            "render_ms": timed(render, args.repeat),
+            "render_peak_kib": peak_kib(render),
+        })
+
+    print(json.dumps(results, indent=2))
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+"""
+Page-level timings on a synthetic database (see datagen.py).
+
+Each scenario runs the kirana_core calls a page makes on a plain (uncached) Database, so
+the numbers are what a cold rerun costs. Visualizations and the Sales Report use their
+default range, first to last sale day; "today" is the last sale day. complete_sale sales are
+deleted and their stock put back afterwards, and the invoice scenario is what the invoice
+worker does per sale (build the HTML, render it with WeasyPrint).
+
+    python benchmarks/datagen.py --db /tmp/kirana_bench.db
+    python benchmarks/bench_pages.py --db /tmp/kirana_bench.db --out before.json
+    python benchmarks/bench_pages.py --db /tmp/kirana_bench.db --out after.json --baseline before.json
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+import kirana_core as core
+from benchlib import make_cart, summarize
+
+
+def timed(run, repeat):
+    latencies = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        run(i)
+        latencies.append(time.perf_counter() - start)
+    return summarize(latencies)
+
+
+def dashboard(db, first_day, last_day):
+    def run(i):
+        products_df = core.fetch_products(db)
+        core.fetch_sales_summary(db, last_day)
+        stock_safe = pd.to_numeric(products_df['stock'], errors='coerce').fillna(0)
+        cost_safe = pd.to_numeric(products_df['cost_price'], errors='coerce').fillna(0)
+        (stock_safe * cost_safe).sum()
+        core.fetch_sales_page(db, None, 51)
+    return run
+
+
+def sales_report(db, first_day, last_day):
+    def run(i):
+        core.fetch_sales_date_bounds(db)
+        core.fetch_sales_page(db, None, 51, first_day, last_day)
+        core.fetch_sales_range_total(db, first_day, last_day)
+    return run
+
+
+def sales_report_month(db, first_day, last_day):
+    month_start = last_day - timedelta(days=30)
+    def run(i):
+        core.fetch_sales_page(db, None, 51, month_start, last_day)
+        core.fetch_sales_range_total(db, month_start, last_day)
+    return run
+
+
+def visualizations_items(db, first_day, last_day):
+    # Line items for the violin, heatmap, histogram and box plots
+    return lambda i: core.fetch_sale_items(db, first_day, last_day)
+
+
+def visualizations_top_n(db, first_day, last_day):
+    def run(i):
+        core.fetch_top_products(db, first_day, last_day, 10)
+        core.fetch_product_sales(db, first_day, last_day)
+    return run
+
+
+def pos_search(db, first_day, last_day):
+    index = core.build_product_index(db)
+    fts = core.has_fts(db.conn)
+    products = list(index["by_id"].values())
+    rng = random.Random(0)
+    def run(i):
+        product = rng.choice(products)
+        name = str(product["name"])
+        core.search_product_ids(db, index, str(product["barcode"]), fts=fts)  # scanner
+        core.search_product_ids(db, index, name[:3], fts=fts)  # first keystrokes
+        core.search_product_ids(db, index, name[:4] + name[5:9], fts=fts)  # typo
+    return run
+
+
+def pos_index(db, first_day, last_day):
+    return lambda i: core.build_product_index(db)
+
+
+def random_cart(rng, products, n_items):
+    return [
+        {"id": int(p["id"]), "name": p["name"], "qty": rng.randint(1, 5), "price": float(p["sale_price"])}
+        for p in rng.sample(products, n_items)
+    ]
+
+
+def bench_complete_sale(db, repeat, items):
+    products = core.fetch_products(db).to_dict("records")
+    rng = random.Random(0)
+    carts = [random_cart(rng, products, min(items, len(products))) for _ in range(repeat)]
+    sale_ids = []
+    def run(i):
+        total = sum(item["qty"] * item["price"] for item in carts[i])
+        sale_ids.append(core.complete_sale(db, carts[i], total, 0.0, "Cash", "bench", ""))
+    try:
+        return timed(run, repeat)
+    finally:
+        core.delete_sales(db, sale_ids)
+        returned = {}
+        for cart in carts[:len(sale_ids)]:
+            for item in cart:
+                returned[item["id"]] = returned.get(item["id"], 0) + item["qty"]
+        db.c.executemany("UPDATE products SET stock = stock + ? WHERE id = ?", [(q, pid) for pid, q in returned.items()])
+        db.commit()
+
+
+def bench_invoice(repeat, items):
+    try:
+        import weasyprint  # noqa: F401
+    except Exception as e:  # missing package or its native libraries
+        return {"skipped": f"WeasyPrint unavailable: {e}"}
+    from kirana_invoice import build_invoice_html, render_invoice_pdf
+    cart = make_cart(items)
+    total = sum(item["qty"] * item["price"] for item in cart)
+    with tempfile.TemporaryDirectory() as invoice_dir:
+        def run(i):
+            html = build_invoice_html(i, cart, total, 0.0)
+            render_invoice_pdf(html, os.path.join(invoice_dir, f"invoice_{i}.pdf"))
+        run(-1)  # first render loads fonts and styles once per process
+        return timed(run, repeat)
+
+
+SCENARIOS = {
+    "dashboard": dashboard,
+    "sales_report": sales_report,
+    "sales_report_30d": sales_report_month,
+    "visualizations_items": visualizations_items,
+    "visualizations_top_n": visualizations_top_n,
+    "pos_index": pos_index,
+    "pos_search": pos_search,
+}
+
+
+def git_head():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline):
+    """Print p50 of every scenario against the baseline run's (ratio < 1 is faster)."""
+    print(f"{'scenario':<24}{'baseline p50':>14}{'p50':>12}{'ratio':>8}", file=sys.stderr)
+    for name, result in results["scenarios"].items():
+        before = baseline.get("scenarios", {}).get(name, {})
+        if "p50_ms" not in result or "p50_ms" not in before:
+            continue
+        ratio = result["p50_ms"] / before["p50_ms"] if before["p50_ms"] else float("nan")
+        print(f"{name:<24}{before['p50_ms']:>14.2f}{result['p50_ms']:>12.2f}{ratio:>8.2f}", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default="kirana_bench.db", help="database made by datagen.py")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--items", type=int, default=5, help="line items per cart for checkout and invoices")
+    parser.add_argument("--only", nargs="+", help="run only these scenarios")
+    parser.add_argument("--out", help="write results as JSON to this file")
+    parser.add_argument("--baseline", help="results JSON of an earlier run to compare against")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        sys.exit(f"{args.db} not found; create it with benchmarks/datagen.py")
+    db = core.open_database(args.db)
+    first_day, last_day = core.fetch_sales_date_bounds(db)
+    if first_day is None:
+        sys.exit(f"{args.db} has no sales")
+
+    scenarios = {}
+    wanted = lambda name: not args.only or name in args.only
+    for name, make_run in SCENARIOS.items():
+        if wanted(name):
+            scenarios[name] = timed(make_run(db, first_day, last_day), args.repeat)
+    if wanted("complete_sale"):
+        scenarios["complete_sale"] = bench_complete_sale(db, args.repeat, args.items)
+    if wanted("invoice_pdf"):
+        scenarios["invoice_pdf"] = bench_invoice(args.repeat, args.items)
+
+    results = {
+        "params": vars(args),
+        "git_head": git_head(),
+        "data": {
+            "products": db.c.execute("SELECT COUNT(*) FROM products").fetchone()[0],
+            "sales": db.c.execute("SELECT COUNT(*) FROM sales_ledger").fetchone()[0],
+            "first_day": first_day.isoformat(),
+            "last_day": last_day.isoformat(),
+        },
+        "scenarios": scenarios,
+    }
+
+    print(json.dumps(results, indent=2))
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Wall time of Streamlit reruns of the app, measured with streamlit.testing.
+
+The first run is cold (process-wide resources such as the connection pool and schema are
+created); later runs are the per-interaction overhead every cashier pays. Pass --app to
+time another revision of the script, e.g.
+
+    git show HEAD~1:kirana_pro.py > /tmp/kirana_pro_old.py
+    python benchmarks/bench_rerun_overhead.py --app /tmp/kirana_pro_old.py
+    python benchmarks/bench_rerun_overhead.py
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from streamlit.testing.v1 import AppTest
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--app", default=os.path.join(ROOT, "kirana_pro.py"))
+    parser.add_argument("--reruns", type=int, default=20)
+    parser.add_argument("--out", help="write results as JSON to this file")
+    args = parser.parse_args()
+    app = os.path.abspath(args.app)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)  # the app keeps its database and invoices relative to the working directory
+        at = AppTest.from_file(app, default_timeout=120)
+        at.secrets["APP_PASSWORD"] = "benchmark"
+        at.secrets["GROQ_API_KEY"] = "benchmark"
+        at.session_state["authenticated"] = True
+
+        start = time.perf_counter()
+        at.run()
+        cold_ms = (time.perf_counter() - start) * 1000
+        if at.exception:
+            sys.exit(f"App raised: {at.exception[0].value}")
+
+        warm = []
+        for _ in range(args.reruns):
+            start = time.perf_counter()
+            at.run()
+            warm.append((time.perf_counter() - start) * 1000)
+
+    results = {
+        "app": app,
+        "cold_ms": round(cold_ms, 1),
+        "warm_mean_ms": round(statistics.mean(warm), 1),
+        "warm_p50_ms": round(statistics.median(warm), 1),
+        "warm_max_ms": round(max(warm), 1),
+    }
+    print(json.dumps(results, indent=2))
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+"""
+Helpers shared by the benchmark scripts: latency summaries and synthetic invoice carts.
+
+The scripts are run directly (python benchmarks/<script>.py), which puts this directory on
+sys.path, so they import it as plain "benchlib".
+"""
+import statistics
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank pct percentile of already sorted values, or None when there are none."""
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * pct / 100))]
+
+
+def summarize(latencies):
+    """Run count plus mean, p50, p95, p99 and max in ms of latencies given in seconds (None when empty)."""
+    latencies = sorted(latencies)
+    ms = lambda value: round(value * 1000, 2) if value is not None else None
+    return {
+        "runs": len(latencies),
+        "mean_ms": ms(statistics.mean(latencies) if latencies else None),
+        "p50_ms": ms(percentile(latencies, 50)),
+        "p95_ms": ms(percentile(latencies, 95)),
+        "p99_ms": ms(percentile(latencies, 99)),
+        "max_ms": ms(latencies[-1] if latencies else None),
+    }
+
+
+def make_cart(n_items):
+    """The same cart of n_items line items every time, for invoice benchmarks."""
+    return [{"id": i, "name": f"Product {i}", "qty": 1 + i % 4, "price": 10.0 + i} for i in range(n_items)]
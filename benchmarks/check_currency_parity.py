@@ -0,0 +1,47 @@
+"""
+Parity check for CurrencyFormatter: formatting one value (metric tiles, invoices) and a whole
+column with series() (tables) must give the same text for every value, including half cents,
+negatives that round to zero, NaN/None, strings and amounts too large for int64 cents.
+
+    python benchmarks/check_currency_parity.py
+"""
+import decimal
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from kirana_currency import CurrencyFormatter
+
+EDGE_VALUES = [
+    0, 0.0, -0.0, 1, -1, 0.005, -0.005, 0.004, -0.004, 0.015, 1.005, 2.675, -2.675, 2.665, 0.125,
+    999.995, 999999.995, 1234567.891, -1234567.891, 1e15, 1e15 + 0.5, 9.2e16, 1e20, -1e20, 1.7e308,
+    float("nan"), float("inf"), float("-inf"), None, np.nan, np.int64(42), np.float32(2.675),
+    True, "12.5", " 7 ", "1,234", "abc", "", "nan", decimal.Decimal("2.675"),
+]
+FORMATTERS = [CurrencyFormatter(), CurrencyFormatter(1.0, "Rs"), CurrencyFormatter(1 / 350, "€"), CurrencyFormatter(0.087, "﷼")]
+
+
+def main():
+    mismatches = []
+    for formatter in FORMATTERS:
+        column = formatter.series(EDGE_VALUES)
+        for value, from_series in zip(EDGE_VALUES, column):
+            single = formatter(value)
+            if single != from_series:
+                mismatches.append(f"rate {formatter.rate:g} {value!r}: __call__ {single!r}, series {from_series!r}")
+    expected = {2.675: "Rs 2.68", -0.004: "Rs 0.00", None: "-", 1234567.891: "Rs 1,234,567.89"}
+    for value, text in expected.items():
+        if CurrencyFormatter(1.0, "Rs")(value) != text:
+            mismatches.append(f"{value!r}: {CurrencyFormatter(1.0, 'Rs')(value)!r}, expected {text!r}")
+    for line in mismatches:
+        print(line)
+    if mismatches:
+        sys.exit(1)
+    print(f"OK: {len(EDGE_VALUES)} values x {len(FORMATTERS)} rates format the same both ways")
+
+
+if __name__ == "__main__":
+    main()
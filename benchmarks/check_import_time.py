@@ -0,0 +1,76 @@
+"""
+Import-time budget for kirana_pro.py.
+
+Runs the module-level imports of the app (the ones every process start and every page pays
+for) under `python -X importtime` and fails if they take longer than the budget or if any
+heavy, page-specific dependency is pulled in eagerly. Imports nested inside pages or
+handlers are not module-level and so are not counted.
+
+    python benchmarks/check_import_time.py --budget-ms 2500
+"""
+import argparse
+import ast
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(ROOT, "kirana_pro.py")
+
+# Only the page or action that needs these may import them
+LAZY_MODULES = ["weasyprint", "matplotlib", "seaborn", "squarify", "fpdf", "groq"]
+
+
+def module_level_imports(path):
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), path)
+    return [ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+
+
+def importtime(statements):
+    """
+    Run statements under -X importtime.
+    Returns: ({module: cumulative_us} for every module imported, total_us of the outermost imports).
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "\n".join(statements)],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    modules, total_us = {}, 0
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = int(cumulative)
+        if len(name) - len(name.lstrip()) == 1:  # nested imports are indented further
+            total_us += int(cumulative)
+    return modules, total_us
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget-ms", type=float, default=2500.0)
+    parser.add_argument("--out", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    statements = module_level_imports(APP)
+    modules, total_us = importtime(statements)
+    total_ms = total_us / 1000
+    eager = sorted(m for m in modules if m.split(".")[0] in LAZY_MODULES)
+
+    results = {"statements": statements, "total_ms": round(total_ms, 1), "budget_ms": args.budget_ms, "eager_heavy_modules": eager}
+    print(json.dumps(results, indent=2))
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if eager:
+        sys.exit(f"FAIL: heavy modules imported at startup: {', '.join(eager)}")
+    if total_ms > args.budget_ms:
+        sys.exit(f"FAIL: startup imports took {total_ms:.0f} ms (budget {args.budget_ms:.0f} ms)")
+    print(f"OK: startup imports took {total_ms:.0f} ms (budget {args.budget_ms:.0f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Deterministic synthetic shop database for benchmarks.
+
+Products get barcodes, categories and prices; sales are spread over the last --years years
+up to --end, with 1-6 line carts that favour popular products, realistic items_json, a mix
+of payment methods and occasional discounts. The same arguments always produce the same data.
+
+    python benchmarks/datagen.py --db /tmp/kirana_bench.db --products 10000 --sales 1000000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+from itertools import accumulate
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import kirana_core as core
+
+CATEGORIES = ["Grocery", "Dairy", "Snacks", "Beverages", "Personal Care", "Household", "Bakery", "Frozen"]
+WORDS = ["Basmati", "Atta", "Sugar", "Tea", "Milk", "Butter", "Biscuit", "Chips", "Juice", "Soap",
+         "Shampoo", "Detergent", "Bread", "Rusk", "Ghee", "Oil", "Dal", "Rice", "Salt", "Spice"]
+SIZES = ["100g", "250g", "500g", "1kg", "5kg", "250ml", "500ml", "1L", "Pack of 6", "Family Pack"]
+PAYMENT_METHODS = ["Cash", "Card", "JazzCash", "EasyPaisa"]
+PAYMENT_WEIGHTS = [60, 20, 12, 8]
+BATCH = 50000
+
+
+def make_products(rng, n_products):
+    rows = []
+    for pid in range(1, n_products + 1):
+        cost = round(rng.uniform(20, 2000), 2)
+        rows.append((
+            pid,
+            f"89{pid:011d}",
+            f"{rng.choice(WORDS)} {rng.choice(WORDS)} {rng.choice(SIZES)} #{pid}",
+            rng.choice(CATEGORIES),
+            cost,
+            round(cost * rng.uniform(1.05, 1.4), 2),
+            1e9,  # effectively unlimited, so checkout benchmarks never run out
+        ))
+    return rows
+
+
+def make_sales(rng, products, n_sales, start_ts, end_ts):
+    """Yield (ledger row, line rows) per sale, sale ids from 1, timestamps in order."""
+    # Popularity falls off with rank, like real shops: a few staples sell most
+    cum_weights = list(accumulate(1 / (rank + 1) for rank in range(len(products))))
+    step = (end_ts - start_ts) / max(n_sales, 1)
+    for sale_id in range(1, n_sales + 1):
+        ts = int(start_ts + (sale_id - 1) * step + rng.random() * step)
+        cart = []
+        for product in rng.choices(products, cum_weights=cum_weights, k=rng.choice([1, 1, 2, 2, 3, 4, 6])):
+            cart.append({"id": product[0], "name": product[2], "qty": rng.randint(1, 5), "price": product[5]})
+        subtotal = sum(item["qty"] * item["price"] for item in cart)
+        discount = round(subtotal * rng.choice([0.05, 0.1]), 2) if rng.random() < 0.1 else 0.0
+        ledger = (
+            sale_id, ts, core.to_paisa(subtotal - discount), core.to_paisa(discount), json.dumps(cart),
+            rng.choices(PAYMENT_METHODS, PAYMENT_WEIGHTS)[0], "", ""
+        )
+        yield ledger, core.sale_item_rows(sale_id, cart)
+
+
+def generate(path, n_products, n_sales, years, end, seed):
+    if os.path.exists(path):
+        os.remove(path)
+    db = core.open_database(path)
+    rng = random.Random(seed)
+    end_ts = core.day_start_ts(end + timedelta(days=1)) - 1
+    start_ts = core.day_start_ts(end - timedelta(days=int(365 * years)))
+
+    products = make_products(rng, n_products)
+    db.c.executemany(
+        "INSERT INTO products (id,barcode,name,category,cost_price,sale_price,stock) VALUES (?,?,?,?,?,?,?)", products
+    )
+    db.commit()
+
+    sales, lines = [], []
+    def flush():
+        db.c.executemany(
+            "INSERT INTO sales_ledger (sale_id,ts,total_paisa,discount_paisa,items_json,payment_method,customer,notes) "
+            "VALUES (?,?,?,?,?,?,?,?)", sales
+        )
+        db.c.executemany(
+            "INSERT INTO sale_lines (sale_id,product_id,name,qty,unit_paisa,line_paisa) VALUES (?,?,?,?,?,?)", lines
+        )
+        db.commit()
+        sales.clear()
+        lines.clear()
+    for ledger, line_rows in make_sales(rng, products, n_sales, start_ts, end_ts):
+        sales.append(ledger)
+        lines.extend(line_rows)
+        if len(sales) >= BATCH:
+            flush()
+    flush()
+    core.rebuild_daily_sales_summary(db)
+    db.conn.execute("ANALYZE")
+    db.conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default="kirana_bench.db", help="database to (re)create")
+    parser.add_argument("--products", type=int, default=10000)
+    parser.add_argument("--sales", type=int, default=1000000)
+    parser.add_argument("--years", type=float, default=3)
+    parser.add_argument("--end", type=date.fromisoformat, default=date(2024, 12, 31), help="last sale day")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    generate(args.db, args.products, args.sales, args.years, args.end, args.seed)
+    print(json.dumps({
+        "db": args.db, "products": args.products, "sales": args.sales, "years": args.years,
+        "end": args.end.isoformat(), "seed": args.seed, "seconds": round(time.perf_counter() - start, 1),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
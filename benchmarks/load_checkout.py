@@ -0,0 +1,204 @@
+"""
+Concurrent cashiers completing sales against one database file.
+
+Each cashier is a thread (or with --processes, a process) with its own connection, like a
+till, calling kirana_core.complete_sale in a loop on carts drawn from a small set of hot
+products with limited stock, so tills contend for the write lock and some carts run out.
+Reports throughput, checkout latency percentiles, the time spent waiting for the write
+lock (BEGIN IMMEDIATE) and checks the invariants:
+
+  * final stock = initial stock - quantities of the sales that succeeded, per product
+  * no stock below zero (no overselling)
+  * sale_lines and the daily rollup hold exactly the sales that succeeded (no lost updates)
+
+Exits with status 1 if an invariant fails.
+
+    python benchmarks/load_checkout.py --cashiers 8 --sales 200
+    python benchmarks/load_checkout.py --cashiers 8 --sales 200 --processes --out load.json
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import queue
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import kirana_core as core
+from benchlib import summarize
+
+
+class TimedCursor:
+    """Cursor wrapper that adds up the time spent acquiring the write lock."""
+    def __init__(self, cursor):
+        self.cursor = cursor
+        self.lock_wait = 0.0
+
+    def execute(self, sql, params=()):
+        if sql.startswith("BEGIN IMMEDIATE"):
+            start = time.perf_counter()
+            try:
+                return self.cursor.execute(sql, params)
+            finally:
+                self.lock_wait += time.perf_counter() - start
+        return self.cursor.execute(sql, params)
+
+    def __getattr__(self, name):
+        return getattr(self.cursor, name)
+
+
+def cashier(path, cashier_id, sales, products, max_items, seed, start, results):
+    """Complete sales carts in a loop; put {sold, latencies, lock_wait, ...} on results."""
+    db = core.open_database(path)
+    db.c = TimedCursor(db.c)
+    rng = random.Random(seed * 1000 + cashier_id)
+    sold, latencies, rejected, errors, sale_ids = {}, [], 0, [], []
+    start.wait()
+    for _ in range(sales):
+        cart = [
+            {"id": p["id"], "name": p["name"], "qty": rng.randint(1, 3), "price": p["sale_price"]}
+            for p in rng.sample(products, rng.randint(1, max_items))
+        ]
+        total = sum(item["qty"] * item["price"] for item in cart)
+        began = time.perf_counter()
+        try:
+            sale_ids.append(core.complete_sale(db, cart, total, 0.0, "Cash", f"cashier {cashier_id}", ""))
+        except core.OutOfStockError:
+            rejected += 1
+            continue
+        except Exception as e:  # e.g. database is locked past busy_timeout
+            errors.append(f"{type(e).__name__}: {e}")
+            continue
+        finally:
+            latencies.append(time.perf_counter() - began)
+        for item in cart:
+            sold[item["id"]] = sold.get(item["id"], 0) + item["qty"]
+    db.conn.close()
+    results.put({
+        "sold": sold, "latencies": latencies, "lock_wait": db.c.lock_wait,
+        "rejected": rejected, "errors": errors, "sale_ids": sale_ids,
+    })
+
+
+def seed_products(db, n_products, stock):
+    db.c.executemany(
+        "INSERT INTO products (barcode,name,category,cost_price,sale_price,stock) VALUES (?,?,?,?,?,?)",
+        [(f"LOAD{i:06d}", f"Load Product {i}", "Load Test", 50.0, 75.0, float(stock)) for i in range(n_products)]
+    )
+    db.commit()
+    return core.fetch_products(db).query("category == 'Load Test'")[["id", "name", "sale_price", "stock"]]
+
+
+def check_invariants(db, initial, sold, sale_ids, sale_count_before):
+    problems = []
+    final = dict(db.c.execute("SELECT id, stock FROM products WHERE id IN (%s)" % ",".join("?" * len(initial)),
+                              list(initial)).fetchall())
+    for pid, before in initial.items():
+        expected = before - sold.get(pid, 0)
+        if abs(final[pid] - expected) > 1e-9:
+            problems.append(f"product {pid}: stock {final[pid]}, expected {expected}")
+        if final[pid] < 0:
+            problems.append(f"product {pid}: oversold, stock {final[pid]}")
+
+    placeholders = ",".join("?" * len(sale_ids)) or "NULL"
+    recorded = {}
+    for pid, qty in db.c.execute(
+        f"SELECT product_id, SUM(qty) FROM sale_lines WHERE sale_id IN ({placeholders}) GROUP BY product_id", sale_ids
+    ):
+        recorded[pid] = qty
+    if {pid: qty for pid, qty in recorded.items() if qty} != {pid: qty for pid, qty in sold.items() if qty}:
+        problems.append("sale_lines quantities differ from the sales the cashiers completed")
+    ledger = db.c.execute(f"SELECT COUNT(*) FROM sales_ledger WHERE sale_id IN ({placeholders})", sale_ids).fetchone()[0]
+    if ledger != len(sale_ids):
+        problems.append(f"{len(sale_ids)} sales completed but {ledger} in sales_ledger")
+    rollup = db.c.execute("SELECT COALESCE(SUM(sale_count), 0) FROM daily_sales_summary").fetchone()[0]
+    if rollup - sale_count_before != len(sale_ids):
+        problems.append(f"daily_sales_summary counts {rollup - sale_count_before} new sales, expected {len(sale_ids)}")
+    return problems
+
+
+def run(path, args):
+    db = core.open_database(path)
+    products_df = seed_products(db, args.products, args.stock)
+    initial = {int(row.id): float(row.stock) for row in products_df.itertuples()}
+    products = [
+        {"id": int(row.id), "name": row.name, "sale_price": float(row.sale_price)} for row in products_df.itertuples()
+    ]
+    sale_count_before = db.c.execute("SELECT COALESCE(SUM(sale_count), 0) FROM daily_sales_summary").fetchone()[0]
+
+    if args.processes:
+        ctx = multiprocessing.get_context("spawn")
+        start, results, worker = ctx.Barrier(args.cashiers + 1), ctx.Queue(), ctx.Process
+    else:
+        start, results, worker = threading.Barrier(args.cashiers + 1), queue.Queue(), threading.Thread
+    workers = [
+        worker(target=cashier, args=(path, i, args.sales, products, args.items, args.seed, start, results))
+        for i in range(args.cashiers)
+    ]
+    for w in workers:
+        w.start()
+    start.wait()
+    began = time.perf_counter()
+    reports = [results.get() for _ in workers]
+    wall = time.perf_counter() - began
+    for w in workers:
+        w.join()
+
+    sold, latencies, sale_ids, errors = {}, [], [], []
+    for report in reports:
+        for pid, qty in report["sold"].items():
+            sold[int(pid)] = sold.get(int(pid), 0) + qty
+        latencies += report["latencies"]
+        sale_ids += report["sale_ids"]
+        errors += report["errors"]
+    lock_waits = [report["lock_wait"] for report in reports]
+    return {
+        "params": vars(args),
+        "completed": len(sale_ids),
+        "out_of_stock": sum(report["rejected"] for report in reports),
+        "errors": len(errors),
+        "error_samples": errors[:10],
+        "wall_s": round(wall, 3),
+        "throughput_sales_per_s": round(len(sale_ids) / wall, 1) if wall else None,
+        "checkout": summarize(latencies),
+        "lock_wait_s": {"total": round(sum(lock_waits), 3), "max_cashier": round(max(lock_waits), 3)},
+        "lock_wait_share": round(sum(lock_waits) / sum(latencies), 3) if latencies else None,
+        "invariant_problems": check_invariants(db, initial, sold, sale_ids, sale_count_before),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", help="database file to load (default a new temporary one); products are added to it")
+    parser.add_argument("--cashiers", type=int, default=8)
+    parser.add_argument("--sales", type=int, default=200, help="checkouts attempted per cashier")
+    parser.add_argument("--products", type=int, default=20, help="hot products the carts draw from")
+    parser.add_argument("--stock", type=float, default=100, help="initial stock of each hot product")
+    parser.add_argument("--items", type=int, default=4, help="most line items per cart")
+    parser.add_argument("--processes", action="store_true", help="one process per cashier instead of a thread")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", help="write results as JSON to this file")
+    args = parser.parse_args()
+    args.items = min(args.items, args.products)
+
+    if args.db:
+        results = run(args.db, args)
+    else:
+        with tempfile.TemporaryDirectory() as workdir:
+            results = run(os.path.join(workdir, "kirana_load.db"), args)
+
+    print(json.dumps(results, indent=2))
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+    if results["invariant_problems"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
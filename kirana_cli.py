@@ -0,0 +1,147 @@
+"""
+Kirana Pro batch jobs, without starting the Streamlit app.
+
+    python kirana_cli.py report --day 2024-05-01 --json
+    python kirana_cli.py invoices --from 2024-05-01 --to 2024-05-31 --workers 4
+    python kirana_cli.py import supplier_catalogue.xlsx --add-stock
+    python kirana_cli.py export sales --format parquet --from 2024-01-01 --to 2024-12-31 --out sales_2024.parquet
+    python kirana_cli.py rebuild-summaries
+"""
+import argparse
+import json
+import os
+import sys
+from datetime import date
+
+import kirana_core as core
+from kirana_currency import CurrencyFormatter
+from kirana_export import EXPORT_FORMATS, export_query
+from kirana_import import count_rows, import_products, read_chunks
+from kirana_invoice import build_invoice_html
+
+
+def parse_day(value):
+    return date.fromisoformat(value)
+
+
+def cmd_migrate(db, args):
+    print(f"Database at {args.db} is up to date.")
+
+
+def cmd_report(db, args):
+    report = core.end_of_day_report(db, args.day, args.top)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f"End of day {report['day']}: {report['sale_count']} sales, net {report['net']:,.2f} "
+          f"(gross {report['gross']:,.2f}, discount {report['discount']:,.2f})")
+    for payment in report["payment_methods"]:
+        print(f"  {payment['payment_method'] or '-':<12} {payment['sale_count']:>6} sales  {payment['net']:>14,.2f}")
+    if report["top_products"]:
+        print("Top products:")
+        for product in report["top_products"]:
+            print(f"  {product['name']:<30} {product['qty']:>10,.2f}  {product['amount']:>14,.2f}")
+
+
+def currency_money(db, currency):
+    """Formatter for currency from the conversion_rates table (PKR if unknown)."""
+    rates = core.fetch_conversion_rates(db).set_index("currency")
+    if currency not in rates.index:
+        return CurrencyFormatter(1.0, "Rs")
+    return CurrencyFormatter(float(rates.at[currency, "rate"]), rates.at[currency, "symbol"] or "")
+
+
+def cmd_invoices(db, args):
+    if args.sale_id:
+        sale_ids = args.sale_id
+    elif args.d1 and args.d2:
+        sale_ids = core.fetch_sale_ids(db, args.d1, args.d2)
+    else:
+        sys.exit("invoices: give --sale-id or both --from and --to")
+    money = currency_money(db, args.currency)
+    build_html = lambda **invoice: build_invoice_html(**invoice, money=money, logo_path=args.logo)
+    results = core.regenerate_invoices(db, args.out_dir, sale_ids, build_html, workers=args.workers)
+    failed = {sale_id: error for sale_id, error in results.items() if error is not None}
+    for sale_id, error in failed.items():
+        print(f"invoice {sale_id}: {error}", file=sys.stderr)
+    print(f"{len(results) - len(failed)} invoices written to {args.out_dir}, {len(failed)} failed.")
+    if failed:
+        sys.exit(1)
+
+
+def cmd_import(db, args):
+    with open(args.file, "rb") as f:
+        total_rows = count_rows(f, args.file)
+        def show_progress(result):
+            print(f"\r{result['rows']:,} / {total_rows:,} rows", end="", file=sys.stderr, flush=True)
+        result = import_products(db.conn, read_chunks(f, args.file, args.chunksize), args.add_stock, show_progress)
+    print(file=sys.stderr)
+    print(f"{result['inserted']:,} products added, {result['updated']:,} updated, {result['rejected']:,} rows rejected.")
+    for error in result["errors"]:
+        print(f"  {error}", file=sys.stderr)
+
+
+def cmd_export(db, args):
+    fmt = next(label for label, (extension, _) in EXPORT_FORMATS.items() if extension == args.format)
+    columns = args.columns or list(core.EXPORT_TABLES[args.table][0])
+    unknown = [col for col in columns if col not in core.EXPORT_TABLES[args.table][0]]
+    if unknown:
+        sys.exit(f"export: unknown columns for {args.table}: {', '.join(unknown)}")
+    query, params = core.export_table_query(args.table, columns, args.d1, args.d2)
+    out_path = args.out or f"{args.table}.{args.format}"
+    with open(out_path, "wb") as out:
+        export_query(db.conn, query, params, fmt, sheet_name=args.table, out=out)
+    print(f"Wrote {out_path}")
+
+
+def cmd_rebuild_summaries(db, args):
+    core.rebuild_daily_sales_summary(db)
+    print("Daily and per-product sales summaries rebuilt.")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=os.path.join("data", "kirana.db"), help="database file (default %(default)s)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("migrate", help="apply pending schema migrations").set_defaults(run=cmd_migrate)
+
+    report = commands.add_parser("report", help="end-of-day sales report")
+    report.add_argument("--day", type=parse_day, default=date.today(), help="YYYY-MM-DD (default today)")
+    report.add_argument("--top", type=int, default=10, help="number of best sellers to list")
+    report.add_argument("--json", action="store_true")
+    report.set_defaults(run=cmd_report)
+
+    invoices = commands.add_parser("invoices", help="regenerate invoice PDFs")
+    invoices.add_argument("--sale-id", type=int, nargs="+")
+    invoices.add_argument("--from", dest="d1", type=parse_day)
+    invoices.add_argument("--to", dest="d2", type=parse_day)
+    invoices.add_argument("--out-dir", default="invoices")
+    invoices.add_argument("--currency", default="PKR")
+    invoices.add_argument("--logo", default=os.path.join("assets", "shop_logo.png"))
+    invoices.add_argument("--workers", type=int, default=2)
+    invoices.set_defaults(run=cmd_invoices)
+
+    bulk_import = commands.add_parser("import", help="upsert products by barcode from a CSV or XLSX file")
+    bulk_import.add_argument("file")
+    bulk_import.add_argument("--add-stock", action="store_true", help="add stock instead of replacing it")
+    bulk_import.add_argument("--chunksize", type=int, default=5000)
+    bulk_import.set_defaults(run=cmd_import)
+
+    export = commands.add_parser("export", help="export a table to CSV, XLSX or Parquet")
+    export.add_argument("table", choices=list(core.EXPORT_TABLES))
+    export.add_argument("--format", choices=[extension for extension, _ in EXPORT_FORMATS.values()], default="csv")
+    export.add_argument("--columns", nargs="+")
+    export.add_argument("--from", dest="d1", type=parse_day)
+    export.add_argument("--to", dest="d2", type=parse_day)
+    export.add_argument("--out", help="output file (default <table>.<format>)")
+    export.set_defaults(run=cmd_export)
+
+    commands.add_parser("rebuild-summaries", help="regenerate the sales rollups").set_defaults(run=cmd_rebuild_summaries)
+
+    args = parser.parse_args(argv)
+    args.run(core.open_database(args.db), args)
+
+
+if __name__ == "__main__":
+    main()
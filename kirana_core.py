@@ -0,0 +1,607 @@
+# Kirana Pro - Headless core: database, catalogue, checkout, reporting and invoicing
+#
+# Everything here works on a Database (one thread's connection) and never imports Streamlit,
+# so scripts, cron jobs and benchmarks can use it directly. kirana_pro.py is the UI on top of it
+# and kirana_cli.py the batch command line.
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from itertools import islice
+
+import pandas as pd
+
+from kirana_import import PRODUCT_COLUMNS
+from kirana_invoice import InvoiceQueue
+from kirana_metrics import span, timed
+from kirana_migrations import migrate
+
+
+# ----- SQLite Connection Pool -----
+class ConnectionPool:
+    """
+    One SQLite connection per thread, all in WAL mode so readers never block the tills' writers.
+    Connections of finished threads are handed to new threads instead of being reopened.
+    """
+    def __init__(self, path, max_idle=8):
+        self.path = path
+        self.max_idle = max_idle
+        self.lock = threading.Lock()
+        self.in_use = {}  # thread ident -> connection
+        self.idle = []
+        # Never written through, so its data_version moves on every commit by any other connection
+        self.monitor = self.connect()
+
+    def connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=30000")
+        conn.execute("PRAGMA cache_size=-32000")  # 32 MB page cache
+        conn.execute("PRAGMA mmap_size=268435456")  # 256 MB memory-mapped reads
+        conn.execute("PRAGMA temp_store=MEMORY")
+        return conn
+
+    def get(self):
+        ident = threading.get_ident()
+        with self.lock:
+            conn = self.in_use.get(ident)
+            if conn is None:
+                self.release_dead_threads()
+                conn = self.idle.pop() if self.idle else self.connect()
+                self.in_use[ident] = conn
+        return conn
+
+    def release_dead_threads(self):
+        alive = {t.ident for t in threading.enumerate()}
+        for ident in [i for i in self.in_use if i not in alive]:
+            conn = self.in_use.pop(ident)
+            if conn.in_transaction:
+                conn.rollback()
+            if len(self.idle) < self.max_idle:
+                self.idle.append(conn)
+            else:
+                conn.close()
+
+    def data_version(self):
+        with self.lock:
+            return self.monitor.execute("PRAGMA data_version").fetchone()[0]
+
+
+class Database:
+    """
+    One thread's handle on the shop database: its connection, a cursor and read_sql.
+    The Streamlit UI overrides read_sql to serve repeated reads from its shared cache.
+    """
+    def __init__(self, conn):
+        self.conn = conn
+        self.c = conn.cursor()
+
+    def read_sql(self, query, params=()):
+        with span("read_sql"):
+            return pd.read_sql(query, self.conn, params=params)
+
+    def commit(self):
+        self.conn.commit()
+
+
+def has_fts(conn):
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE name='products_fts'").fetchone() is not None
+
+
+def open_database(path):
+    """Open the database at path for the calling thread, applying pending migrations. Returns: a Database."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    conn = ConnectionPool(path).get()
+    migrate(conn)
+    return Database(conn)
+
+
+# ----- Sales Rollups -----
+# Sales are stored with integer UNIX timestamps and integer paisa; see typed_sales in kirana_migrations
+def to_paisa(amount):
+    return int(round(float(amount or 0) * 100))
+
+
+def day_start_ts(day):
+    """UNIX timestamp of local midnight at the start of day."""
+    return int(datetime(day.year, day.month, day.day).timestamp())
+
+
+def sales_ts_range_params(d1, d2):
+    # The range is [midnight of d1, midnight after d2)
+    return (day_start_ts(d1), day_start_ts(d2 + timedelta(days=1)))
+
+
+def sale_item_rows(sale_id, items):
+    rows = []
+    for item in items:
+        qty = float(item.get('qty', 0) or 0)
+        price = to_paisa(item.get('price', 0))
+        rows.append((sale_id, item.get('id'), item.get('name', ''), qty, price, int(round(qty * price))))
+    return rows
+
+
+def update_daily_sales_summary(db, ts, payment_method, total_paisa, discount_paisa, sign=1):
+    """Add (sign=1) or remove (sign=-1) one sale from the daily rollup. Caller commits."""
+    day, payment_method = datetime.fromtimestamp(ts).strftime("%Y-%m-%d"), payment_method or ""
+    db.c.execute(
+        """
+        INSERT INTO daily_sales_summary (day,payment_method,gross_paisa,discount_paisa,sale_count) VALUES (?,?,?,?,?)
+        ON CONFLICT(day,payment_method) DO UPDATE SET
+            gross_paisa = gross_paisa + excluded.gross_paisa,
+            discount_paisa = discount_paisa + excluded.discount_paisa,
+            sale_count = sale_count + excluded.sale_count
+        """,
+        (day, payment_method, sign * (total_paisa + discount_paisa), sign * discount_paisa, sign)
+    )
+    if sign < 0:
+        # Only a removal can empty a row, and only the one just updated (a primary-key lookup)
+        db.c.execute(
+            "DELETE FROM daily_sales_summary WHERE day = ? AND payment_method = ? AND sale_count <= 0",
+            (day, payment_method)
+        )
+
+
+def update_product_daily_sales(db, ts, line_rows, sign=1):
+    """Add (sign=1) or remove (sign=-1) a sale's lines, as sale_item_rows, from the per-product rollup. Caller commits."""
+    totals = {}
+    for _, product_id, _, qty, _, line_paisa in line_rows:
+        if product_id is not None:
+            qty_sum, paisa_sum = totals.get(product_id, (0, 0))
+            totals[product_id] = (qty_sum + qty, paisa_sum + line_paisa)
+    day = datetime.fromtimestamp(ts).strftime("%Y-%m-%d")
+    db.c.executemany(
+        """
+        INSERT INTO product_daily_sales (day,product_id,qty,revenue_paisa) VALUES (?,?,?,?)
+        ON CONFLICT(day,product_id) DO UPDATE SET
+            qty = qty + excluded.qty,
+            revenue_paisa = revenue_paisa + excluded.revenue_paisa
+        """,
+        [(day, product_id, sign * qty, sign * paisa) for product_id, (qty, paisa) in totals.items()]
+    )
+    if sign < 0:
+        db.c.execute("DELETE FROM product_daily_sales WHERE day = ? AND qty <= 1e-9 AND revenue_paisa <= 0", (day,))
+
+
+def rebuild_daily_sales_summary(db):
+    """Regenerate the daily and per-product rollups from the sales ledger."""
+    db.c.execute("DELETE FROM daily_sales_summary")
+    db.c.execute("""
+        INSERT INTO daily_sales_summary (day,payment_method,gross_paisa,discount_paisa,sale_count)
+        SELECT date(ts, 'unixepoch', 'localtime'), COALESCE(payment_method,''),
+               SUM(total_paisa + discount_paisa), SUM(discount_paisa), COUNT(*)
+        FROM sales_ledger GROUP BY 1, 2
+    """)
+    db.c.execute("DELETE FROM product_daily_sales")
+    db.c.execute("""
+        INSERT INTO product_daily_sales (day,product_id,qty,revenue_paisa)
+        SELECT date(s.ts, 'unixepoch', 'localtime'), sl.product_id, SUM(sl.qty), SUM(sl.line_paisa)
+        FROM sale_lines sl JOIN sales_ledger s ON s.sale_id = sl.sale_id
+        WHERE sl.product_id IS NOT NULL
+        GROUP BY 1, 2
+    """)
+    db.commit()
+
+
+# ----- Catalogue -----
+@timed("fetch_products")
+def fetch_products(db):
+    try:
+        return db.read_sql("SELECT * FROM products")
+    except:
+        return pd.DataFrame(columns=['id','barcode','name','category','cost_price','sale_price','stock'])
+
+
+@timed("build_product_index")
+def build_product_index(db):
+    """Lookup tables for the POS: products by id and barcode, selectbox labels and search keys."""
+    products = fetch_products(db)
+    by_id, by_barcode, labels, search_keys = {}, {}, {}, []
+    for prod in products.to_dict('records'):
+        pid = int(prod['id'])
+        barcode = str(prod['barcode'] or "")
+        by_id[pid] = prod
+        if barcode:
+            by_barcode.setdefault(barcode, prod)
+        labels[pid] = f"{prod['name']} (Stock: {prod['stock']})"
+        search_keys.append((pid, f"{prod['name'] or ''} {barcode}".lower()))
+    return {"by_id": by_id, "by_barcode": by_barcode, "labels": labels, "search_keys": search_keys}
+
+
+def search_products_fts(db, q, limit=50):
+    """Ranked product ids for q from the trigram index; any shared trigram counts, so typos still match."""
+    q = q.strip().lower()
+    trigrams = dict.fromkeys(q[i:i+3] for i in range(len(q) - 2))
+    match = " OR ".join('"' + t.replace('"', '""') + '"' for t in trigrams)
+    rows = db.c.execute(
+        "SELECT rowid FROM products_fts WHERE products_fts MATCH ? ORDER BY rank LIMIT ?",
+        (match, int(limit))
+    ).fetchall()
+    return [row[0] for row in rows]
+
+
+@timed("search_product_ids")
+def search_product_ids(db, index, q, limit=50, fts=True):
+    """
+    At most limit product ids matching q: an exact barcode hit first, then ranked FTS matches or a
+    substring scan. An empty q gives the first limit products, never the whole catalogue.
+    """
+    if not q:
+        return list(islice(index["by_id"], limit))
+    exact = index["by_barcode"].get(q.strip())
+    if exact is not None:
+        return [int(exact['id'])]
+    if fts and len(q.strip()) >= 3:
+        return [pid for pid in search_products_fts(db, q, limit) if pid in index["by_id"]]
+    q = q.lower()
+    return list(islice((pid for pid, key in index["search_keys"] if q in key), limit))
+
+
+def fetch_products_page(db, after_id=None, limit=50, max_stock=None):
+    """Keyset page of products by id: id > after_id, optionally only those with stock <= max_stock."""
+    query = "SELECT id,name,barcode,category,cost_price,sale_price,stock FROM products WHERE id > ?"
+    params = (after_id if after_id is not None else -1,)
+    if max_stock is not None:
+        query += " AND stock <= ?"
+        params += (float(max_stock),)
+    query += " ORDER BY id LIMIT ?"
+    return db.read_sql(query, params + (int(limit),))
+
+
+def delete_products(db, product_ids):
+    db.c.executemany("DELETE FROM products WHERE id=?", [(int(pid),) for pid in product_ids])
+    db.commit()
+
+
+def fetch_conversion_rates(db):
+    return db.read_sql("SELECT currency, rate, symbol FROM conversion_rates ORDER BY currency")
+
+
+# ----- Checkout -----
+class OutOfStockError(Exception):
+    pass
+
+
+@timed("complete_sale")
+def complete_sale(db, cart, total, discount, payment_method="Cash", customer="", notes=""):
+    """
+    Deduct stock and record the sale in a single BEGIN IMMEDIATE transaction.
+    Stock is decremented only where enough is left, so concurrent tills cannot oversell;
+    on any shortfall nothing is written and OutOfStockError is raised.
+    Returns: the new sale_id.
+    """
+    needed = {}
+    for item in cart:
+        needed[item['id']] = needed.get(item['id'], 0) + float(item['qty'])
+    sale_ts = int(time.time())
+    total_paisa, discount_paisa = to_paisa(total), to_paisa(discount)
+    db.c.execute("BEGIN IMMEDIATE")
+    try:
+        db.c.executemany(
+            "UPDATE products SET stock = stock - ? WHERE id = ? AND stock >= ?",
+            [(qty, pid, qty) for pid, qty in needed.items()]
+        )
+        if db.c.rowcount != len(needed):
+            db.conn.rollback()
+            for item in cart:
+                row = db.c.execute("SELECT stock FROM products WHERE id=?", (item['id'],)).fetchone()
+                if row is None or float(row[0] or 0) < needed[item['id']]:
+                    raise OutOfStockError(f"Not enough stock for {item['name']}")
+            raise OutOfStockError("Not enough stock")
+        db.c.execute("INSERT INTO sales_ledger (ts,total_paisa,items_json,payment_method,customer,notes,discount_paisa) VALUES (?,?,?,?,?,?,?)",
+                  (sale_ts,total_paisa,json.dumps(cart),payment_method,customer,notes,discount_paisa))
+        sale_id = db.c.lastrowid
+        line_rows = sale_item_rows(sale_id, cart)
+        db.c.executemany(
+            "INSERT INTO sale_lines (sale_id,product_id,name,qty,unit_paisa,line_paisa) VALUES (?,?,?,?,?,?)",
+            line_rows
+        )
+        update_daily_sales_summary(db, sale_ts, payment_method, total_paisa, discount_paisa)
+        update_product_daily_sales(db, sale_ts, line_rows)
+        db.commit()
+    except Exception:
+        if db.conn.in_transaction:
+            db.conn.rollback()
+        raise
+    return sale_id
+
+
+def delete_sales(db, sale_ids):
+    """
+    Delete sales with their line items and back them out of the rollups, in a single
+    BEGIN IMMEDIATE transaction: the ledger rows are read under the write lock, so a sale
+    deleted by two sessions at once is backed out only once.
+    """
+    db.c.execute("BEGIN IMMEDIATE")
+    try:
+        for sale_id in sale_ids:
+            row = db.c.execute(
+                "SELECT ts, payment_method, total_paisa, discount_paisa FROM sales_ledger WHERE sale_id=?", (sale_id,)
+            ).fetchone()
+            if row is not None:
+                update_daily_sales_summary(db, *row, sign=-1)
+                lines = db.c.execute(
+                    "SELECT sale_id, product_id, name, qty, unit_paisa, line_paisa FROM sale_lines WHERE sale_id=?", (sale_id,)
+                ).fetchall()
+                update_product_daily_sales(db, row[0], lines, sign=-1)
+        ids = [(int(sale_id),) for sale_id in sale_ids]
+        db.c.executemany("DELETE FROM sale_lines WHERE sale_id=?", ids)
+        db.c.executemany("DELETE FROM sales_ledger WHERE sale_id=?", ids)
+        db.commit()
+    except Exception:
+        if db.conn.in_transaction:
+            db.conn.rollback()
+        raise
+
+
+# ----- Reporting -----
+# Old-shape sales columns, computed from the ledger's integer storage
+SALES_COLUMNS = {
+    'sale_id': "sale_id",
+    'date': "strftime('%Y-%m-%d %H:%M:%S', ts, 'unixepoch', 'localtime') AS date",
+    'total_amount': "total_paisa / 100.0 AS total_amount",
+    'items_json': "items_json",
+    'payment_method': "payment_method",
+    'customer': "customer",
+    'notes': "notes",
+    'discount': "discount_paisa / 100.0 AS discount",
+}
+
+
+@timed("fetch_sales")
+def fetch_sales(db, d1=None, d2=None, columns=None):
+    """Sales between d1 and d2 (inclusive, either may be None), optionally only some columns."""
+    columns = [col for col in (columns or SALES_COLUMNS) if col in SALES_COLUMNS]
+    query = f"SELECT {','.join(SALES_COLUMNS[col] for col in columns)} FROM sales_ledger"
+    params = ()
+    if d1 is not None or d2 is not None:
+        query += " WHERE ts >= ? AND ts < ?"
+        params = (day_start_ts(d1) if d1 else -2**63, day_start_ts(d2 + timedelta(days=1)) if d2 else 2**63 - 1)
+    try:
+        return db.read_sql(query, params)
+    except:
+        return pd.DataFrame(columns=columns)
+
+
+def fetch_sales_date_bounds(db):
+    """First and last sale date, or (None, None) when there are no sales."""
+    first, last = db.c.execute("SELECT MIN(ts), MAX(ts) FROM sales_ledger").fetchone()
+    if first is None:
+        return (None, None)
+    return (datetime.fromtimestamp(first).date(), datetime.fromtimestamp(last).date())
+
+
+def count_undated_sales(db):
+    """Legacy sales whose date could not be read; they are kept in sales_undated, outside all reports."""
+    return db.c.execute("SELECT COUNT(*) FROM sales_undated").fetchone()[0]
+
+
+@timed("fetch_sales_page")
+def fetch_sales_page(db, before=None, limit=50, d1=None, d2=None):
+    """
+    Keyset page of sales, newest first: (ts, sale_id) < before, optionally within [d1, d2].
+    Rows include ts, so the last row's (ts, sale_id) is the next page's cursor; the walk runs
+    down idx_sales_ledger_ts and stops after limit rows, however many sales the range holds.
+    """
+    columns = ','.join(['ts'] + [SALES_COLUMNS[col] for col in ['sale_id','date','customer','total_amount','payment_method','notes']])
+    query = f"SELECT {columns} FROM sales_ledger WHERE (ts, sale_id) < (?, ?)"
+    params = tuple(before) if before is not None else (2**63 - 1, 2**63 - 1)
+    if d1 is not None and d2 is not None:
+        query += " AND ts >= ? AND ts < ?"
+        params += sales_ts_range_params(d1, d2)
+    query += " ORDER BY ts DESC, sale_id DESC LIMIT ?"
+    return db.read_sql(query, params + (int(limit),))
+
+
+@timed("fetch_sales_summary")
+def fetch_sales_summary(db, day):
+    """Today's net sales, all-time net sales and sale count from the daily rollup."""
+    row = db.c.execute(
+        """
+        SELECT COALESCE(SUM(CASE WHEN day = ? THEN gross_paisa - discount_paisa END), 0),
+               COALESCE(SUM(gross_paisa - discount_paisa), 0),
+               COALESCE(SUM(sale_count), 0)
+        FROM daily_sales_summary
+        """,
+        (day.strftime("%Y-%m-%d"),)
+    ).fetchone()
+    return {"total_today": row[0] / 100, "total_sales": row[1] / 100, "sale_count": row[2]}
+
+
+def fetch_sales_range_total(db, d1, d2):
+    """Net sales between d1 and d2 (inclusive) from the daily rollup."""
+    total_paisa = db.c.execute(
+        "SELECT COALESCE(SUM(gross_paisa - discount_paisa), 0) FROM daily_sales_summary WHERE day >= ? AND day <= ?",
+        (d1.strftime("%Y-%m-%d"), d2.strftime("%Y-%m-%d"))
+    ).fetchone()[0]
+    return total_paisa / 100
+
+
+@timed("fetch_daily_sales")
+def fetch_daily_sales(db, d1, d2):
+    """Net sales per day between d1 and d2 (inclusive) from the daily rollup, indexed by day."""
+    daily = db.read_sql(
+        """
+        SELECT day, SUM(gross_paisa - discount_paisa) AS net_paisa FROM daily_sales_summary
+        WHERE day >= ? AND day <= ? GROUP BY day ORDER BY day
+        """,
+        (d1.strftime("%Y-%m-%d"), d2.strftime("%Y-%m-%d"))
+    )
+    return (daily.set_index('day')['net_paisa'] / 100).rename('total_amount')
+
+
+@timed("fetch_sale_items")
+def fetch_sale_items(db, d1, d2):
+    """Line items of all sales between d1 and d2 (inclusive)."""
+    return db.read_sql(
+        """
+        SELECT sl.product_id AS id, sl.name, sl.qty, sl.unit_paisa / 100.0 AS price, sl.line_paisa / 100.0 AS line_total
+        FROM sale_lines sl JOIN sales_ledger s ON s.sale_id = sl.sale_id
+        WHERE s.ts >= ? AND s.ts < ?
+        """,
+        sales_ts_range_params(d1, d2)
+    )
+
+
+@timed("fetch_top_products")
+def fetch_top_products(db, d1, d2, limit=10):
+    """
+    The limit best-selling products between d1 and d2 by quantity, from the per-product daily rollup.
+    The rollup is aggregated and cut to limit first, so only the winners' names are looked up.
+    """
+    return db.read_sql(
+        """
+        SELECT COALESCE(p.name, '#' || top.product_id) AS name, top.qty, top.revenue_paisa / 100.0 AS amount
+        FROM (
+            SELECT product_id, SUM(qty) AS qty, SUM(revenue_paisa) AS revenue_paisa
+            FROM product_daily_sales
+            WHERE day >= ? AND day <= ?
+            GROUP BY product_id
+            ORDER BY qty DESC
+            LIMIT ?
+        ) top LEFT JOIN products p ON p.id = top.product_id
+        ORDER BY top.qty DESC
+        """,
+        (d1.strftime("%Y-%m-%d"), d2.strftime("%Y-%m-%d"), int(limit))
+    )
+
+
+@timed("fetch_product_sales")
+def fetch_product_sales(db, d1, d2, limit=None):
+    """Per-product quantity, average price and amount sold between d1 and d2, best sellers first."""
+    query = """
+        SELECT sl.name, SUM(sl.qty) AS qty, AVG(sl.unit_paisa) / 100.0 AS price, SUM(sl.line_paisa) / 100.0 AS amount
+        FROM sale_lines sl JOIN sales_ledger s ON s.sale_id = sl.sale_id
+        WHERE s.ts >= ? AND s.ts < ?
+        GROUP BY sl.product_id, sl.name
+        ORDER BY qty DESC
+    """
+    params = sales_ts_range_params(d1, d2)
+    if limit:
+        query += " LIMIT ?"
+        params += (int(limit),)
+    return db.read_sql(query, params)
+
+
+@timed("end_of_day_report")
+def end_of_day_report(db, day, top=10):
+    """Totals for one day by payment method plus its best sellers, all from the rollups."""
+    day_str = day.strftime("%Y-%m-%d")
+    by_method = db.c.execute(
+        """
+        SELECT payment_method, sale_count, gross_paisa, discount_paisa FROM daily_sales_summary
+        WHERE day = ? ORDER BY payment_method
+        """,
+        (day_str,)
+    ).fetchall()
+    payments = [
+        {"payment_method": method or "", "sale_count": count, "gross": gross / 100,
+         "discount": discount / 100, "net": (gross - discount) / 100}
+        for method, count, gross, discount in by_method
+    ]
+    return {
+        "day": day_str,
+        "sale_count": sum(p["sale_count"] for p in payments),
+        "gross": sum(p["gross"] for p in payments),
+        "discount": sum(p["discount"] for p in payments),
+        "net": sum(p["net"] for p in payments),
+        "payment_methods": payments,
+        "top_products": fetch_top_products(db, day, day, top).to_dict('records'),
+    }
+
+
+# ----- Exports -----
+SALE_ITEM_COLUMNS = {
+    'sale_id': "sl.sale_id",
+    'date': "strftime('%Y-%m-%d %H:%M:%S', s.ts, 'unixepoch', 'localtime') AS date",
+    'product_id': "sl.product_id",
+    'name': "sl.name",
+    'qty': "sl.qty",
+    'unit_price': "sl.unit_paisa / 100.0 AS unit_price",
+    'line_total': "sl.line_paisa / 100.0 AS line_total",
+}
+
+
+EXPORT_TABLES = {
+    # table: (column expressions, FROM clause, timestamp column for date filters)
+    "sales": (SALES_COLUMNS, "sales_ledger", "ts"),
+    "sale_items": (SALE_ITEM_COLUMNS, "sale_lines sl JOIN sales_ledger s ON s.sale_id = sl.sale_id", "s.ts"),
+    "products": ({col: col for col in PRODUCT_COLUMNS}, "products", None),
+}
+
+
+def export_table_query(table, columns, d1=None, d2=None):
+    """SELECT for an export of the chosen columns, limited to [d1, d2] for dated tables. Returns: (query, params)."""
+    expressions, source, ts_column = EXPORT_TABLES[table]
+    query = f"SELECT {','.join(expressions[col] for col in columns if col in expressions)} FROM {source}"
+    params = ()
+    if ts_column and d1 is not None and d2 is not None:
+        query += f" WHERE {ts_column} >= ? AND {ts_column} < ?"
+        params = sales_ts_range_params(d1, d2)
+    return query, params
+
+
+# ----- Invoicing -----
+def fetch_invoice(db, sale_id):
+    """
+    Everything build_invoice_html needs for a recorded sale, as keyword arguments
+    (line items come from sale_lines), or None for an unknown sale_id.
+    """
+    row = db.c.execute(
+        """
+        SELECT ts, total_paisa, discount_paisa, customer, payment_method, notes
+        FROM sales_ledger WHERE sale_id = ?
+        """,
+        (int(sale_id),)
+    ).fetchone()
+    if row is None:
+        return None
+    ts, total_paisa, discount_paisa, customer, payment_method, notes = row
+    items = [
+        {"id": product_id, "name": name, "qty": qty, "price": unit_paisa / 100}
+        for product_id, name, qty, unit_paisa in db.c.execute(
+            "SELECT product_id, name, qty, unit_paisa FROM sale_lines WHERE sale_id = ? ORDER BY item_id", (int(sale_id),)
+        )
+    ]
+    return {
+        "sale_id": int(sale_id), "items": items, "total": total_paisa / 100, "discount": discount_paisa / 100,
+        "customer": customer or "", "payment_method": payment_method or "", "notes": notes or "",
+        "sale_date": datetime.fromtimestamp(ts),
+    }
+
+
+def fetch_sale_ids(db, d1, d2):
+    """Ids of the sales between d1 and d2 (inclusive), oldest first."""
+    return [row[0] for row in db.c.execute(
+        "SELECT sale_id FROM sales_ledger WHERE ts >= ? AND ts < ? ORDER BY sale_id", sales_ts_range_params(d1, d2)
+    )]
+
+
+def regenerate_invoices(db, invoice_dir, sale_ids, build_html, workers=2):
+    """
+    Re-render the invoice PDFs of sale_ids on a worker pool; build_html(**fetch_invoice(...)) returns the HTML.
+    Returns: {sale_id: None on success or the error} (unknown sales are reported as errors too).
+    """
+    os.makedirs(invoice_dir, exist_ok=True)
+    queue = InvoiceQueue(invoice_dir, workers=workers, max_pending=max(len(sale_ids), 1))
+    results = {}
+    try:
+        for sale_id in sale_ids:
+            invoice = fetch_invoice(db, sale_id)
+            if invoice is None:
+                results[sale_id] = LookupError(f"No sale #{sale_id}")
+            else:
+                queue.submit(sale_id, build_html(**invoice))
+        for sale_id in sale_ids:
+            if sale_id not in results:
+                try:
+                    queue.wait(sale_id)
+                    results[sale_id] = None
+                except Exception as e:
+                    results[sale_id] = e
+    finally:
+        queue.executor.shutdown()
+    return results
@@ -0,0 +1,77 @@
+# Kirana Pro - Currency conversion and formatting for single values and whole columns
+import math
+
+import numpy as np
+import pandas as pd
+
+
+MISSING = "-"  # shown for None, NaN and infinite amounts
+MAX_FAST_CENTS = 1e17  # beyond this series() formats with __call__ instead of int64 NumPy math
+
+
+def _cents(amounts):
+    """
+    Whole cents of abs(amounts), halves rounded away from zero. Rounding to 6 places first drops
+    binary noise, so 2.675 (stored as 2.67499999...) gives 268 cents as the user expects.
+    """
+    with np.errstate(over="ignore"):  # amounts near the float limit give inf cents
+        return np.floor(np.round(np.abs(amounts) * 100, 6) + 0.5)
+
+
+class CurrencyFormatter:
+    """
+    Converts PKR amounts at a fixed rate and formats them as '<symbol> 1,234.56'.
+    Calling it formats one value; series() formats a whole column with NumPy in one pass.
+    Both follow the same rules: halves round away from zero, no '-0.00', MISSING for
+    None/NaN/infinite amounts and non-numeric values shown as they are.
+    Built once per selected currency and rate, so nothing is looked up per value.
+    """
+    def __init__(self, rate=1.0, symbol=""):
+        self.rate = float(rate)
+        self.prefix = f"{symbol} " if symbol else ""
+
+    def __call__(self, x):
+        if isinstance(x, (int, float, np.integer, np.floating)) and not isinstance(x, (bool, np.bool_)):
+            amount = float(x)
+        else:
+            if x is None or (pd.api.types.is_scalar(x) and pd.isna(x)):
+                return MISSING
+            amount = float(pd.to_numeric(x, errors="coerce"))
+            if math.isnan(amount):
+                return str(x)
+        amount *= self.rate
+        if not math.isfinite(amount):
+            return MISSING
+        cents = _cents(amount)
+        if not math.isfinite(cents):
+            return f"{self.prefix}{amount:,.2f}"
+        whole, frac = divmod(int(cents), 100)
+        sign = "-" if amount < 0 and (whole or frac) else ""
+        return f"{self.prefix}{sign}{whole:,}.{frac:02d}"
+
+    def series(self, values):
+        """Format a Series (or anything array-like) of amounts. Returns: a Series of strings, same index."""
+        values = pd.Series(values)
+        amounts = pd.to_numeric(values, errors="coerce").to_numpy(dtype=float) * self.rate
+        missing = values.isna().to_numpy() | np.isinf(amounts)
+        cents_float = _cents(np.where(np.isfinite(amounts), amounts, 0))
+        fast = np.isfinite(amounts) & (cents_float < MAX_FAST_CENTS)
+        cents = np.where(fast, cents_float, 0).astype(np.int64)
+        whole, frac = np.divmod(cents, 100)
+
+        # Zero-padded thousands groups, then leading zeros and separators stripped: 000,012,345 -> 12,345
+        n_groups = max(1, (len(str(whole.max())) + 2) // 3) if len(whole) else 1
+        text = np.char.mod("%03d", whole // 10 ** (3 * (n_groups - 1)) % 1000)
+        for group in range(n_groups - 2, -1, -1):
+            text = np.char.add(np.char.add(text, ","), np.char.mod("%03d", whole // 10 ** (3 * group) % 1000))
+        text = np.char.lstrip(text, "0,")
+        text = np.where(text == "", "0", text)
+
+        sign = np.where((amounts < 0) & (cents > 0), "-", "")
+        text = np.char.add(np.char.add(np.char.add(sign, text), "."), np.char.mod("%02d", frac))
+        text = np.char.add(self.prefix, text)
+        formatted = text.astype(object)
+        # The rare rest: missing, non-numeric (shown as is) or too large for int64 cents (scalar path)
+        for i in np.flatnonzero(~fast):
+            formatted[i] = MISSING if missing[i] else str(values.iloc[i]) if np.isnan(amounts[i]) else self(values.iloc[i])
+        return pd.Series(formatted, index=values.index, name=values.name, dtype=object)
@@ -0,0 +1,81 @@
+# Kirana Pro - Streaming exports (CSV / XLSX / Parquet) from SQLite, a chunk at a time
+import importlib.util
+import tempfile
+
+import pandas as pd
+
+
+EXPORT_FORMATS = {
+    # label: (file extension, MIME type)
+    "CSV": ("csv", "text/csv"),
+    "Excel (XLSX)": ("xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "Parquet": ("parquet", "application/vnd.apache.parquet"),
+}
+
+
+def parquet_available():
+    """Parquet export needs the optional pyarrow package."""
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def iter_chunks(conn, query, params=(), chunksize=5000):
+    """Yield the query result as DataFrames of at most chunksize rows; the first one may be empty."""
+    cursor = conn.execute(query, params)
+    columns = [col[0] for col in cursor.description]
+    while True:
+        rows = cursor.fetchmany(chunksize)
+        # Kept as object so integer columns with NULLs are not turned into floats
+        yield pd.DataFrame(rows, columns=columns, dtype=object)
+        if len(rows) < chunksize:
+            break
+
+
+def write_csv(chunks, out, sheet_name=None):
+    for i, chunk in enumerate(chunks):
+        out.write(chunk.to_csv(index=False, header=i == 0).encode("utf-8"))
+
+
+def write_xlsx(chunks, out, sheet_name="data"):
+    # Write-only workbooks stream rows to the file instead of keeping every cell in memory
+    from openpyxl import Workbook
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(sheet_name)
+    for i, chunk in enumerate(chunks):
+        if i == 0:
+            sheet.append(list(chunk.columns))
+        for row in chunk.astype(object).where(chunk.notna(), None).itertuples(index=False, name=None):
+            sheet.append(row)
+    workbook.save(out)
+
+
+def write_parquet(chunks, out, sheet_name=None):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    writer = None
+    try:
+        for chunk in chunks:
+            if writer is None:
+                schema = pa.Schema.from_pandas(chunk, preserve_index=False)
+                # Columns that are all NULL in the first chunk are typed from later ones as text
+                schema = pa.schema([
+                    field.with_type(pa.string()) if pa.types.is_null(field.type) else field for field in schema
+                ])
+                writer = pq.ParquetWriter(out, schema)
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+WRITERS = {"CSV": write_csv, "Excel (XLSX)": write_xlsx, "Parquet": write_parquet}
+
+
+def export_query(conn, query, params=(), fmt="CSV", sheet_name="data", chunksize=5000, out=None):
+    """
+    Stream a query result into out (a binary file, default a new temporary file) in fmt,
+    one chunk of rows in memory at a time. Returns: the file, rewound to the start.
+    """
+    out = out if out is not None else tempfile.TemporaryFile()
+    WRITERS[fmt](iter_chunks(conn, query, params, chunksize), out, sheet_name=sheet_name)
+    out.seek(0)
+    return out
@@ -0,0 +1,175 @@
+# Kirana Pro - Bulk product import (CSV / XLSX), upserted by barcode in batched transactions
+import numpy as np
+import pandas as pd
+
+
+PRODUCT_COLUMNS = ['barcode', 'name', 'category', 'cost_price', 'sale_price', 'stock']
+NUMERIC_COLUMNS = ['cost_price', 'sale_price', 'stock']
+MAX_REPORTED_ERRORS = 50
+
+
+def is_excel(filename):
+    return filename.lower().endswith((".xlsx", ".xlsm"))
+
+
+def _count_csv_records(file, block_size=1 << 20):
+    """CSV records in file, read a block at a time; newlines inside quoted fields do not count."""
+    records, in_quotes, last = 0, False, b"\n"
+    while True:
+        block = file.read(block_size)
+        if not block:
+            break
+        if b'"' not in block:
+            records += 0 if in_quotes else block.count(b"\n")
+        else:
+            # Every quote flips inside/outside (an escaped "" flips twice); count newlines outside quotes
+            data = np.frombuffer(block, dtype=np.uint8)
+            inside = (np.cumsum(data == ord('"')) + in_quotes) % 2 == 1
+            records += int(np.count_nonzero((data == ord("\n")) & ~inside))
+            in_quotes = bool(inside[-1])
+        last = block[-1:]
+    return records + (last != b"\n")  # the last record may not end with a newline
+
+
+def count_rows(file, filename):
+    """Number of data rows in the upload (for progress), without parsing them or reading it all into memory."""
+    if is_excel(filename):
+        from openpyxl import load_workbook
+        workbook = load_workbook(file, read_only=True)
+        total = max((workbook.active.max_row or 1) - 1, 0)
+        workbook.close()
+    else:
+        total = max(_count_csv_records(file) - 1, 0)
+    file.seek(0)
+    return total
+
+
+def read_chunks(file, filename, chunksize=5000):
+    """Yield the upload as DataFrames of at most chunksize rows, all values as read (no type inference)."""
+    if is_excel(filename):
+        from openpyxl import load_workbook
+        workbook = load_workbook(file, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = [str(col) if col is not None else "" for col in next(rows, ())]
+            chunk = []
+            for row in rows:
+                chunk.append(row[:len(header)])
+                if len(chunk) >= chunksize:
+                    yield pd.DataFrame(chunk, columns=header)
+                    chunk = []
+            if chunk:
+                yield pd.DataFrame(chunk, columns=header)
+        finally:
+            workbook.close()
+    else:
+        yield from pd.read_csv(file, chunksize=chunksize, dtype=str, keep_default_na=False)
+
+
+def _text(column):
+    return column.fillna("").astype(str).str.strip()
+
+
+def _barcode(column):
+    # Excel stores numeric barcodes as numbers: 8901234567890.0 -> '8901234567890'
+    return _text(column).str.replace(r"\.0$", "", regex=True)
+
+
+def validate_chunk(df, first_row=2):
+    """
+    Normalize a chunk to PRODUCT_COLUMNS. first_row is the file line of df's first row.
+    Missing columns and blank cells are left as None so updates keep the product's current value.
+    Returns: (valid rows, list of 'row N: problem' messages for the rejected ones).
+    """
+    df = df.rename(columns=lambda col: str(col).strip().lower().replace(" ", "_"))
+    if "name" not in df:
+        raise ValueError("The file needs a 'name' column")
+    df = df.reset_index(drop=True)
+    rows = pd.DataFrame({
+        "barcode": _barcode(df["barcode"]) if "barcode" in df else "",
+        "name": _text(df["name"]),
+        "category": _text(df["category"]) if "category" in df else "",
+    })
+    rows["category"] = rows["category"].mask(rows["category"] == "", None)
+
+    problems = pd.Series("", index=df.index)
+    problems = problems.mask(rows["name"] == "", "name is empty")
+    for col in NUMERIC_COLUMNS:
+        raw = df[col] if col in df else pd.Series("", index=df.index)
+        blank = raw.isna() | (raw.astype(str).str.strip() == "")
+        values = pd.to_numeric(raw.mask(blank), errors="coerce")
+        problems = problems.mask((problems == "") & ~blank & values.isna(), f"{col} is not a number")
+        problems = problems.mask((problems == "") & (values < 0), f"{col} is negative")
+        rows[col] = values.astype(object).where(values.notna(), None)
+
+    bad = problems != ""
+    errors = [f"row {first_row + i}: {problems[i]}" for i in problems.index[bad]]
+    return rows[~bad][PRODUCT_COLUMNS], errors
+
+
+def barcode_ids(conn):
+    """barcode -> product id for every product with a barcode (the first one wins for duplicates)."""
+    ids = {}
+    for product_id, barcode in conn.execute("SELECT id, barcode FROM products WHERE barcode != '' ORDER BY id"):
+        ids.setdefault(barcode, product_id)
+    return ids
+
+
+def upsert_chunk(conn, rows, ids, add_stock=False):
+    """
+    Write one validated chunk in a single transaction: rows whose barcode is known update that
+    product, the rest are inserted. ids (barcode -> id) is updated with the new products.
+    Returns: (inserted, updated).
+    """
+    # Within a chunk the last row for a barcode wins
+    with_barcode = rows[rows["barcode"] != ""].drop_duplicates("barcode", keep="last")
+    rows = pd.concat([rows[rows["barcode"] == ""], with_barcode])
+    known = rows["barcode"].map(ids)
+    updates, inserts = rows[known.notna()], rows[known.isna()]
+
+    inserts = inserts.fillna({"category": "General", "cost_price": 0.0, "sale_price": 0.0, "stock": 0.0})
+    stock_sql = "stock = stock + COALESCE(?, 0)" if add_stock else "stock = COALESCE(?, stock)"
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.executemany(
+            "UPDATE products SET name=?, category=COALESCE(?, category), cost_price=COALESCE(?, cost_price), "
+            f"sale_price=COALESCE(?, sale_price), {stock_sql} WHERE id=?",
+            zip(updates["name"], updates["category"], updates["cost_price"], updates["sale_price"],
+                updates["stock"], known[known.notna()].astype(int).tolist())
+        )
+        last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM products").fetchone()[0]
+        conn.executemany(
+            "INSERT INTO products (barcode,name,category,cost_price,sale_price,stock) VALUES (?,?,?,?,?,?)",
+            inserts[PRODUCT_COLUMNS].itertuples(index=False, name=None)
+        )
+        new_ids = conn.execute(
+            "SELECT id, barcode FROM products WHERE id > ? AND barcode != ''", (last_id,)
+        ).fetchall()
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    for product_id, barcode in new_ids:
+        ids.setdefault(barcode, product_id)
+    return len(inserts), len(updates)
+
+
+def import_products(conn, chunks, add_stock=False, on_progress=None):
+    """
+    Validate and upsert product chunks by barcode, one transaction per chunk.
+    on_progress(result) is called after every chunk.
+    Returns: {rows, inserted, updated, rejected, errors} where errors lists the first rejected rows.
+    """
+    result = {"rows": 0, "inserted": 0, "updated": 0, "rejected": 0, "errors": []}
+    ids = barcode_ids(conn)
+    for chunk in chunks:
+        rows, errors = validate_chunk(chunk, first_row=result["rows"] + 2)
+        inserted, updated = upsert_chunk(conn, rows, ids, add_stock)
+        result["rows"] += len(chunk)
+        result["inserted"] += inserted
+        result["updated"] += updated
+        result["rejected"] += len(errors)
+        result["errors"].extend(errors[:MAX_REPORTED_ERRORS - len(result["errors"])])
+        if on_progress:
+            on_progress(result)
+    return result
@@ -0,0 +1,199 @@
+# Kirana Pro - Invoice rendering (HTML + WeasyPrint PDF) and background render queue
+import base64
+import mimetypes
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from functools import lru_cache
+from html import escape
+
+from kirana_metrics import timed
+from kirana_translations import translations
+
+
+INVOICE_LABELS = ['Add Product', 'Total', 'Subtotal', 'Discount', 'Notes Label']
+# Used for labels not passed to build_invoice_html, e.g. invoices regenerated from the CLI
+ENGLISH_LABELS = {key: translations.get(key, {}).get("English", key) for key in INVOICE_LABELS}
+
+INVOICE_CSS = """
+body { font-family: Arial, sans-serif; font-size: 12px; }
+table { border-collapse: collapse; width: 100%; margin-top: 10px; }
+th, td { border: 1px solid #333; padding: 5px; }
+th { background-color: #f2f2f2; }
+h1 { text-align: center; }
+"""
+
+INVOICE_TEMPLATE = """
+<html>
+<head><meta charset="utf-8"></head>
+<body>
+    {logo_html}
+    <h1>Shop Invoice</h1>
+    <p><strong>Invoice ID:</strong> {sale_id}</p>
+    <p><strong>Date:</strong> {date}</p>
+    {customer_html}
+    <p><strong>Payment Method:</strong> {payment_method}</p>
+
+    <table>
+        <tr>
+            <th>{label_product}</th>
+            <th>Qty</th>
+            <th>{label_total}</th>
+            <th>{label_subtotal}</th>
+        </tr>
+        {items_rows}
+    </table>
+
+    <p><strong>{label_discount}:</strong> {discount}</p>
+    <p><strong>{label_total}:</strong> {total}</p>
+    {notes_html}
+</body>
+</html>
+"""
+
+ROW_TEMPLATE = """<tr>
+    <td>{}</td>
+    <td style="text-align:center">{}</td>
+    <td style="text-align:right">{:.2f}</td>
+    <td style="text-align:right">{:.2f}</td>
+</tr>"""
+
+# WeasyPrint stylesheet and font configuration, built once per rendering thread
+_resources = threading.local()
+
+
+@lru_cache(maxsize=4)
+def _logo_data_uri(logo_path, mtime):
+    with open(logo_path, "rb") as f:
+        data = base64.b64encode(f.read()).decode("ascii")
+    mime = mimetypes.guess_type(logo_path)[0] or "image/png"
+    return f"data:{mime};base64,{data}"
+
+
+def logo_data_uri(logo_path):
+    """The logo as a data URI, read from disk only when the file changes."""
+    if not logo_path or not os.path.exists(logo_path):
+        return None
+    return _logo_data_uri(logo_path, os.path.getmtime(logo_path))
+
+
+def build_invoice_html(sale_id, items, total, discount, customer="", payment_method="Cash", notes="",
+                       labels=None, money=str, logo_path=None, sale_date=None):
+    """
+    Build the invoice HTML.
+    labels: translated column/field labels keyed by their English name (default English),
+    money: currency formatter,
+    sale_date: when the sale was made (default now, for a new sale).
+    """
+    labels = {**ENGLISH_LABELS, **(labels or {})}
+    label = lambda key: escape(labels.get(key, key))
+
+    items_rows = "".join(
+        ROW_TEMPLATE.format(
+            escape(str(item.get('name', ''))[:40]),
+            int(item.get('qty', 0)),
+            float(item.get('price', 0.0)),
+            float(item.get('price', 0.0)) * int(item.get('qty', 0)),
+        )
+        for item in items
+    )
+
+    logo_uri = logo_data_uri(logo_path)
+    return INVOICE_TEMPLATE.format(
+        logo_html=f'<img src="{logo_uri}" style="width:100px; float:right;">' if logo_uri else "",
+        sale_id=sale_id,
+        date=(sale_date or datetime.now()).strftime('%Y-%m-%d %H:%M:%S'),
+        customer_html=f"<p><strong>Customer:</strong> {escape(customer)}</p>" if customer else "",
+        payment_method=escape(payment_method),
+        label_product=label('Add Product'),
+        label_total=label('Total'),
+        label_subtotal=label('Subtotal'),
+        label_discount=label('Discount'),
+        items_rows=items_rows,
+        discount=escape(money(discount)),
+        total=escape(money(total)),
+        notes_html=f"<p><strong>{label('Notes Label')}:</strong> {escape(notes)}</p>" if notes else "",
+    )
+
+
+@timed("invoice.render_pdf")
+def render_invoice_pdf(html_content, invoice_file):
+    """Render invoice HTML to a PDF file with WeasyPrint. Returns: invoice_file."""
+    # WeasyPrint is heavy to import, so it is loaded on the first render rather than at startup
+    from weasyprint import CSS, HTML
+    from weasyprint.text.fonts import FontConfiguration
+
+    if not hasattr(_resources, "css"):
+        _resources.font_config = FontConfiguration()
+        _resources.css = CSS(string=INVOICE_CSS, font_config=_resources.font_config)
+    HTML(string=html_content).write_pdf(
+        invoice_file, stylesheets=[_resources.css], font_config=_resources.font_config
+    )
+    return invoice_file
+
+
+class InvoiceQueue:
+    """
+    Renders invoice PDFs on a small pool of background threads so checkout returns immediately.
+    At most max_pending renders wait in the queue; beyond that submit() renders inline (backpressure).
+    The status of the last keep_jobs invoices is tracked by sale_id.
+    """
+    def __init__(self, invoice_dir, workers=2, max_pending=32, keep_jobs=256):
+        self.invoice_dir = invoice_dir
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="invoice")
+        self.slots = threading.BoundedSemaphore(max_pending)
+        self.keep_jobs = keep_jobs
+        self.lock = threading.Lock()
+        self.jobs = OrderedDict()  # sale_id -> Future
+
+    def invoice_file(self, sale_id):
+        return os.path.join(self.invoice_dir, f"invoice_{sale_id}.pdf")
+
+    def submit(self, sale_id, html_content):
+        invoice_file = self.invoice_file(sale_id)
+        if self.slots.acquire(blocking=False):
+            future = self.executor.submit(self._render, html_content, invoice_file)
+        else:
+            # Queue is full: render on the caller's thread, tracked like any other job
+            future = Future()
+            try:
+                future.set_result(render_invoice_pdf(html_content, invoice_file))
+            except Exception as e:
+                future.set_exception(e)
+        with self.lock:
+            self.jobs[sale_id] = future
+            self.jobs.move_to_end(sale_id)
+            while len(self.jobs) > self.keep_jobs:
+                self.jobs.popitem(last=False)
+        return future
+
+    def _render(self, html_content, invoice_file):
+        try:
+            return render_invoice_pdf(html_content, invoice_file)
+        finally:
+            self.slots.release()
+
+    def status(self, sale_id):
+        """'queued', 'rendering', 'ready', 'failed', or None for an unknown invoice."""
+        with self.lock:
+            future = self.jobs.get(sale_id)
+        if future is None:
+            return "ready" if os.path.exists(self.invoice_file(sale_id)) else None
+        if not future.done():
+            return "rendering" if future.running() else "queued"
+        return "failed" if future.exception() is not None else "ready"
+
+    def error(self, sale_id):
+        with self.lock:
+            future = self.jobs.get(sale_id)
+        return future.exception() if future is not None and future.done() else None
+
+    def wait(self, sale_id, timeout=None):
+        """Block until the invoice is rendered. Returns: path to the PDF."""
+        with self.lock:
+            future = self.jobs.get(sale_id)
+        if future is not None:
+            future.result(timeout)
+        return self.invoice_file(sale_id)
@@ -0,0 +1,311 @@
+# Kirana Pro - Timing spans aggregated into per-page, per-operation latency histograms
+#
+# span("fetch_products") / @timed("fetch_products") time a block and add it to the process-wide
+# REGISTRY under the current page (set_page, default "background" for worker threads).
+# MetricsExporter writes the histograms to a Prometheus text file and, as per-interval rows,
+# to a metrics table in a separate SQLite file, so it never invalidates the shop database's caches.
+import bisect
+import contextvars
+import functools
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+
+# Upper bounds in seconds, as in Prometheus' default buckets; the last bucket is +Inf
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_page = contextvars.ContextVar("kirana_metrics_page", default="background")
+
+
+def set_page(page):
+    """Label the spans recorded from now on in this thread with page."""
+    _page.set(page)
+
+
+class Histogram:
+    __slots__ = ("counts", "count", "sum", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+
+def quantile(counts, q):
+    """Estimate the q quantile (seconds) from bucket counts, interpolating inside the bucket."""
+    total = sum(counts)
+    if not total:
+        return None
+    rank = q * total
+    seen = 0
+    for i, n in enumerate(counts):
+        if n and seen + n >= rank:
+            lower = BUCKETS[i - 1] if i else 0.0
+            upper = BUCKETS[i] if i < len(BUCKETS) else BUCKETS[-1]
+            return lower + (upper - lower) * (rank - seen) / n
+        seen += n
+    return BUCKETS[-1]
+
+
+class Registry:
+    """Thread-safe histograms keyed by (page, operation)."""
+    def __init__(self):
+        self.enabled = True
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.generation = 0  # bumped by reset(), so exporters know their last snapshot is stale
+
+    def observe(self, op, seconds, page=None):
+        if not self.enabled:
+            return
+        key = (page or _page.get(), op)
+        i = bisect.bisect_left(BUCKETS, seconds)
+        with self.lock:
+            hist = self.histograms.get(key)
+            if hist is None:
+                hist = self.histograms[key] = Histogram()
+            hist.counts[i] += 1
+            hist.count += 1
+            hist.sum += seconds
+            if seconds > hist.max:
+                hist.max = seconds
+
+    def snapshot(self):
+        """{(page, op): (bucket counts, count, sum, max)}, copied under the lock."""
+        with self.lock:
+            return {key: (list(h.counts), h.count, h.sum, h.max) for key, h in self.histograms.items()}
+
+    def reset(self):
+        with self.lock:
+            self.histograms.clear()
+            self.generation += 1
+
+    def summary(self):
+        """One row per (page, op) with count, mean, estimated p50/p95 and max in ms, slowest total first."""
+        rows = []
+        for (page, op), (counts, count, total, peak) in self.snapshot().items():
+            rows.append({
+                "page": page,
+                "op": op,
+                "count": count,
+                "total_ms": round(total * 1000, 1),
+                "mean_ms": round(total / count * 1000, 2),
+                "p50_ms": round(min(quantile(counts, 0.5), peak) * 1000, 2),
+                "p95_ms": round(min(quantile(counts, 0.95), peak) * 1000, 2),
+                "max_ms": round(peak * 1000, 2),
+            })
+        return sorted(rows, key=lambda row: row["total_ms"], reverse=True)
+
+    def to_prometheus(self):
+        """The histograms in the Prometheus text exposition format."""
+        lines = [
+            "# HELP kirana_op_duration_seconds Time spent in instrumented operations.",
+            "# TYPE kirana_op_duration_seconds histogram",
+        ]
+        label = lambda value: str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        for (page, op), (counts, count, total, _) in sorted(self.snapshot().items()):
+            labels = f'page="{label(page)}",op="{label(op)}"'
+            cumulative = 0
+            for bound, n in zip(BUCKETS + ("+Inf",), counts):
+                cumulative += n
+                lines.append(f'kirana_op_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f"kirana_op_duration_seconds_sum{{{labels}}} {total:.6f}")
+            lines.append(f"kirana_op_duration_seconds_count{{{labels}}} {count}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+class span:
+    """with span("op"): ... records the block's wall time under op (also when it raises)."""
+    __slots__ = ("op", "start")
+
+    def __init__(self, op):
+        self.op = op
+
+    def __enter__(self):
+        self.start = time.perf_counter() if REGISTRY.enabled else None
+        return self
+
+    def __exit__(self, *exc):
+        if self.start is not None:
+            REGISTRY.observe(self.op, time.perf_counter() - self.start)
+        return False
+
+
+def timed(op):
+    """Decorator form of span."""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(op):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+class MetricsExporter:
+    """
+    Every interval seconds (and on flush()), writes REGISTRY to prom_path and appends the counts
+    since the previous write to the metrics table in db_path. Either path may be None.
+    """
+    def __init__(self, prom_path=None, db_path=None, interval=60, registry=REGISTRY):
+        self.prom_path = prom_path
+        self.db_path = db_path
+        self.interval = interval
+        self.registry = registry
+        self.lock = threading.Lock()
+        self.previous = {}
+        self.generation = registry.generation
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name="kirana-metrics", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stopped.set()
+        self.flush()
+
+    def _run(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                self.flush()
+            except (OSError, sqlite3.Error):
+                pass  # metrics must never take the app down; the next interval retries
+
+    def flush(self):
+        with self.lock:
+            snapshot = self.registry.snapshot()
+            if self.registry.generation != self.generation:
+                self.previous, self.generation = {}, self.registry.generation
+            if self.prom_path:
+                self._write_prometheus()
+            if self.db_path:
+                self._write_sqlite(snapshot)
+            self.previous = snapshot
+
+    def _write_prometheus(self):
+        os.makedirs(os.path.dirname(self.prom_path) or ".", exist_ok=True)
+        # Written next to the target and renamed, so a scraper never reads half a file
+        tmp_path = f"{self.prom_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.registry.to_prometheus())
+        os.replace(tmp_path, self.prom_path)
+
+    def _write_sqlite(self, snapshot):
+        rows = []
+        ts = int(time.time())
+        for (page, op), (counts, count, total, _) in snapshot.items():
+            old_counts, old_count, old_total, _ = self.previous.get((page, op), ([0] * len(counts), 0, 0.0, 0.0))
+            if count == old_count:
+                continue
+            delta = [new - old for new, old in zip(counts, old_counts)]
+            rows.append((
+                ts, page, op, count - old_count, round((total - old_total) * 1000, 3),
+                round(quantile(delta, 0.5) * 1000, 3), round(quantile(delta, 0.95) * 1000, 3), json.dumps(delta),
+            ))
+        if not rows:
+            return
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=5)
+        try:
+            conn.execute('''
+            CREATE TABLE IF NOT EXISTS metrics(
+                ts INTEGER NOT NULL,
+                page TEXT,
+                op TEXT,
+                count INTEGER,
+                sum_ms REAL,
+                p50_ms REAL,
+                p95_ms REAL,
+                buckets TEXT
+            )
+            ''')
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_metrics_ts ON metrics(ts)")
+            conn.executemany("INSERT INTO metrics VALUES (?,?,?,?,?,?,?,?)", rows)
+            conn.commit()
+        finally:
+            conn.close()
+
+
+class StackSampler:
+    """
+    Profiles one rerun by sampling the calling thread's Python stack every interval seconds
+    from a background thread. Nothing is installed in the interpreter (no setprofile or
+    sys.monitoring hook), so other sessions' threads run unprofiled and at full speed.
+    Sampling ends on stop(), after max_seconds, or as soon as the frame that called start()
+    has left the stack, so a rerun that ends in st.rerun(), st.stop() or an exception still
+    finishes its profile. result is set once it has ended.
+    """
+    def __init__(self, interval=0.002, max_seconds=300):
+        self.interval = interval
+        self.max_seconds = max_seconds
+        self.stacks = {}  # tuple of (function, file:line) labels, outermost first -> samples
+        self.samples = 0
+        self.seconds = 0.0
+        self.result = None
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def start(self):
+        # The frame that called start() (the script's module frame); stacks are recorded from it down
+        root = sys._getframe(1)
+        self.thread = threading.Thread(
+            target=self._run, args=(threading.get_ident(), root), name="kirana-profiler", daemon=True
+        )
+        self.thread.start()
+        return self
+
+    def stop(self):
+        """Stop sampling and wait for the result."""
+        self.stopped.set()
+        self.thread.join()
+        return self.result
+
+    def _run(self, thread_id, root):
+        started = time.perf_counter()
+        while not self.stopped.wait(self.interval) and time.perf_counter() - started < self.max_seconds:
+            frame = sys._current_frames().get(thread_id)
+            stack = []
+            while frame is not None and frame is not root:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if frame is None:  # root has returned: the rerun is over
+                break
+            stack.append("<script>")
+            key = tuple(reversed(stack))
+            self.stacks[key] = self.stacks.get(key, 0) + 1
+            self.samples += 1
+        del root, frame
+        self.seconds = time.perf_counter() - started
+        self.result = self._summarize()
+
+    def _summarize(self, top=30):
+        """{"functions": top functions by cumulative time, "collapsed": stacks in flamegraph.pl format, ...}"""
+        ms_per_sample = self.seconds * 1000 / self.samples if self.samples else 0.0
+        own, cumulative = {}, {}
+        for stack, n in self.stacks.items():
+            own[stack[-1]] = own.get(stack[-1], 0) + n
+            for function in set(stack):
+                cumulative[function] = cumulative.get(function, 0) + n
+        functions = [
+            {
+                "function": function,
+                "samples": n,
+                "own_ms": round(own.get(function, 0) * ms_per_sample, 1),
+                "cumulative_ms": round(n * ms_per_sample, 1),
+            }
+            for function, n in sorted(cumulative.items(), key=lambda item: item[1], reverse=True)[:top]
+        ]
+        collapsed = "".join(f"{';'.join(stack)} {n}\n" for stack, n in sorted(self.stacks.items()))
+        return {"functions": functions, "collapsed": collapsed, "samples": self.samples, "seconds": self.seconds}
@@ -0,0 +1,347 @@
+# Kirana Pro - Versioned schema migrations
+#
+# Each migration runs exactly once per database, in order, inside its own BEGIN IMMEDIATE
+# transaction, and is recorded in the schema_version table. Released migrations are never
+# edited: schema changes are made by appending a new one to MIGRATIONS.
+import json
+import sqlite3
+import threading
+from datetime import datetime
+
+
+def _parse_items_json(raw_json):
+    try:
+        return json.loads(raw_json)
+    except (TypeError, ValueError):
+        try:
+            # Older rows were saved with single quotes
+            return json.loads(raw_json.replace("'", '"'))
+        except (AttributeError, ValueError):
+            return []
+
+
+def base_tables(c):
+    c.execute('''
+    CREATE TABLE IF NOT EXISTS products(
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        barcode TEXT,
+        name TEXT,
+        category TEXT,
+        cost_price REAL,
+        sale_price REAL,
+        stock REAL
+    )
+    ''')
+    c.execute('''
+    CREATE TABLE IF NOT EXISTS sales(
+        sale_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        date TEXT,
+        total_amount REAL,
+        items_json TEXT,
+        payment_method TEXT,
+        customer TEXT,
+        notes TEXT
+    )
+    ''')
+
+
+def sale_items(c):
+    """Normalized sale lines, backfilled from items_json."""
+    c.execute('''
+    CREATE TABLE IF NOT EXISTS sale_items(
+        item_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        sale_id INTEGER,
+        product_id INTEGER,
+        name TEXT,
+        qty REAL,
+        unit_price REAL,
+        line_total REAL
+    )
+    ''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_sale_items_sale_id ON sale_items(sale_id)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_sale_items_product_id ON sale_items(product_id)")
+    rows = []
+    for sale_id, raw_json in c.execute("SELECT sale_id, items_json FROM sales").fetchall():
+        for item in _parse_items_json(raw_json):
+            qty = float(item.get('qty', 0) or 0)
+            price = float(item.get('price', 0) or 0)
+            rows.append((sale_id, item.get('id'), item.get('name', ''), qty, price, qty * price))
+    c.execute("DELETE FROM sale_items")
+    c.executemany(
+        "INSERT INTO sale_items (sale_id,product_id,name,qty,unit_price,line_total) VALUES (?,?,?,?,?,?)",
+        rows
+    )
+
+
+def daily_sales_summary(c):
+    """Per-day, per-payment-method rollup for the Dashboard; sales gain a discount column."""
+    if "discount" not in [row[1] for row in c.execute("PRAGMA table_info(sales)")]:
+        c.execute("ALTER TABLE sales ADD COLUMN discount REAL DEFAULT 0")
+    c.execute('''
+    CREATE TABLE IF NOT EXISTS daily_sales_summary(
+        day TEXT,
+        payment_method TEXT,
+        gross REAL DEFAULT 0,
+        discount REAL DEFAULT 0,
+        sale_count INTEGER DEFAULT 0,
+        PRIMARY KEY (day, payment_method)
+    )
+    ''')
+    c.execute("DELETE FROM daily_sales_summary")
+    c.execute("""
+        INSERT INTO daily_sales_summary (day,payment_method,gross,discount,sale_count)
+        SELECT substr(date,1,10), COALESCE(payment_method,''),
+               SUM(COALESCE(total_amount,0) + COALESCE(discount,0)), SUM(COALESCE(discount,0)), COUNT(*)
+        FROM sales GROUP BY 1, 2
+    """)
+
+
+def products_fts(c):
+    """FTS5 trigram product search kept in sync by triggers. Returns False (retry later) without FTS5."""
+    try:
+        c.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+            name, barcode, category,
+            content='products', content_rowid='id', tokenize='trigram'
+        )
+        ''')
+    except sqlite3.OperationalError:
+        return False
+    c.execute('''
+    CREATE TRIGGER IF NOT EXISTS products_fts_insert AFTER INSERT ON products BEGIN
+        INSERT INTO products_fts(rowid, name, barcode, category) VALUES (new.id, new.name, new.barcode, new.category);
+    END
+    ''')
+    c.execute('''
+    CREATE TRIGGER IF NOT EXISTS products_fts_delete AFTER DELETE ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, barcode, category) VALUES ('delete', old.id, old.name, old.barcode, old.category);
+    END
+    ''')
+    c.execute('''
+    CREATE TRIGGER IF NOT EXISTS products_fts_update AFTER UPDATE OF name, barcode, category ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, barcode, category) VALUES ('delete', old.id, old.name, old.barcode, old.category);
+        INSERT INTO products_fts(rowid, name, barcode, category) VALUES (new.id, new.name, new.barcode, new.category);
+    END
+    ''')
+    c.execute("INSERT INTO products_fts(products_fts) VALUES ('rebuild')")
+
+
+def lookup_indexes(c):
+    """Indexes for date-range reports, barcode scans and name lookups."""
+    c.execute("CREATE INDEX IF NOT EXISTS idx_sales_date ON sales(date)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_products_barcode ON products(barcode)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_products_name ON products(name)")
+
+
+def typed_sales(c):
+    """
+    Sales move to integer storage: sales_ledger.ts is a UNIX timestamp and money is integer paisa,
+    in sales_ledger, sale_lines and the daily rollup. sales and sale_items become read-only views
+    with the old TEXT date / REAL money shape for exports and outside readers. Sales whose date
+    cannot be parsed are kept, unchanged, in sales_undated rather than given an invented date.
+    """
+    c.execute('''
+    CREATE TABLE sales_ledger(
+        sale_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        ts INTEGER NOT NULL,
+        total_paisa INTEGER NOT NULL DEFAULT 0,
+        discount_paisa INTEGER NOT NULL DEFAULT 0,
+        items_json TEXT,
+        payment_method TEXT,
+        customer TEXT,
+        notes TEXT
+    )
+    ''')
+    # Stored dates are local time; the 'utc' modifier converts them to a UTC epoch
+    c.execute("""
+        INSERT INTO sales_ledger (sale_id,ts,total_paisa,discount_paisa,items_json,payment_method,customer,notes)
+        SELECT sale_id, CAST(strftime('%s', date, 'utc') AS INTEGER),
+               CAST(ROUND(COALESCE(total_amount,0) * 100) AS INTEGER), CAST(ROUND(COALESCE(discount,0) * 100) AS INTEGER),
+               items_json, payment_method, customer, notes
+        FROM sales WHERE strftime('%s', date, 'utc') IS NOT NULL
+    """)
+    c.execute('''
+    CREATE TABLE sales_undated(
+        sale_id INTEGER PRIMARY KEY,
+        date TEXT,
+        total_amount REAL,
+        discount REAL,
+        items_json TEXT,
+        payment_method TEXT,
+        customer TEXT,
+        notes TEXT
+    )
+    ''')
+    c.execute("""
+        INSERT INTO sales_undated (sale_id,date,total_amount,discount,items_json,payment_method,customer,notes)
+        SELECT sale_id, date, total_amount, discount, items_json, payment_method, customer, notes
+        FROM sales WHERE strftime('%s', date, 'utc') IS NULL
+    """)
+    c.execute('''
+    CREATE TABLE sale_lines(
+        item_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        sale_id INTEGER,
+        product_id INTEGER,
+        name TEXT,
+        qty REAL,
+        unit_paisa INTEGER NOT NULL DEFAULT 0,
+        line_paisa INTEGER NOT NULL DEFAULT 0
+    )
+    ''')
+    c.execute("""
+        INSERT INTO sale_lines (item_id,sale_id,product_id,name,qty,unit_paisa,line_paisa)
+        SELECT item_id, sale_id, product_id, name, qty,
+               CAST(ROUND(COALESCE(unit_price,0) * 100) AS INTEGER), CAST(ROUND(COALESCE(line_total,0) * 100) AS INTEGER)
+        FROM sale_items
+    """)
+    # Carry the AUTOINCREMENT counters over so ids of already deleted rows are never reused
+    for old_table, new_table in (("sales", "sales_ledger"), ("sale_items", "sale_lines")):
+        row = c.execute("SELECT seq FROM sqlite_sequence WHERE name=?", (old_table,)).fetchone()
+        if row is not None:
+            c.execute("DELETE FROM sqlite_sequence WHERE name=?", (new_table,))
+            c.execute("INSERT INTO sqlite_sequence (name,seq) VALUES (?,?)", (new_table, row[0]))
+    c.execute("DROP TABLE sales")
+    c.execute("DROP TABLE sale_items")
+    c.execute("CREATE INDEX idx_sales_ledger_ts ON sales_ledger(ts, sale_id)")  # keyset paging order
+    c.execute("CREATE INDEX idx_sale_lines_sale_id ON sale_lines(sale_id)")
+    c.execute("CREATE INDEX idx_sale_lines_product_id ON sale_lines(product_id)")
+    c.execute('''
+    CREATE VIEW sales AS
+    SELECT sale_id, strftime('%Y-%m-%d %H:%M:%S', ts, 'unixepoch', 'localtime') AS date,
+           total_paisa / 100.0 AS total_amount, items_json, payment_method, customer, notes,
+           discount_paisa / 100.0 AS discount
+    FROM sales_ledger
+    ''')
+    c.execute('''
+    CREATE VIEW sale_items AS
+    SELECT item_id, sale_id, product_id, name, qty,
+           unit_paisa / 100.0 AS unit_price, line_paisa / 100.0 AS line_total
+    FROM sale_lines
+    ''')
+
+    c.execute("DROP TABLE daily_sales_summary")
+    c.execute('''
+    CREATE TABLE daily_sales_summary(
+        day TEXT,
+        payment_method TEXT,
+        gross_paisa INTEGER DEFAULT 0,
+        discount_paisa INTEGER DEFAULT 0,
+        sale_count INTEGER DEFAULT 0,
+        PRIMARY KEY (day, payment_method)
+    )
+    ''')
+    c.execute("""
+        INSERT INTO daily_sales_summary (day,payment_method,gross_paisa,discount_paisa,sale_count)
+        SELECT date(ts, 'unixepoch', 'localtime'), COALESCE(payment_method,''),
+               SUM(total_paisa + discount_paisa), SUM(discount_paisa), COUNT(*)
+        FROM sales_ledger GROUP BY 1, 2
+    """)
+
+
+def conversion_rates(c):
+    """Configurable PKR conversion rates and symbols, seeded with the rates the app used to hard-code."""
+    c.execute('''
+    CREATE TABLE IF NOT EXISTS conversion_rates(
+        currency TEXT PRIMARY KEY,
+        rate REAL NOT NULL,
+        symbol TEXT
+    )
+    ''')
+    c.executemany(
+        "INSERT OR IGNORE INTO conversion_rates (currency,rate,symbol) VALUES (?,?,?)",
+        [
+            ("PKR", 1, "Rs"),
+            ("German Euro", 1/350, "€"),
+            ("French Euro", 1/350, "€"),
+            ("Spanish Euro", 1/350, "€"),
+            ("Arabic Riyal", 0.087, "﷼"),
+        ]
+    )
+
+
+def product_daily_sales(c):
+    """Per-product, per-day quantity and revenue (paisa) for top-N charts, backfilled from sale_lines."""
+    c.execute('''
+    CREATE TABLE IF NOT EXISTS product_daily_sales(
+        day TEXT,
+        product_id INTEGER,
+        qty REAL DEFAULT 0,
+        revenue_paisa INTEGER DEFAULT 0,
+        PRIMARY KEY (day, product_id)
+    )
+    ''')
+    c.execute("DELETE FROM product_daily_sales")
+    c.execute("""
+        INSERT INTO product_daily_sales (day,product_id,qty,revenue_paisa)
+        SELECT date(s.ts, 'unixepoch', 'localtime'), sl.product_id, SUM(sl.qty), SUM(sl.line_paisa)
+        FROM sale_lines sl JOIN sales_ledger s ON s.sale_id = sl.sale_id
+        WHERE sl.product_id IS NOT NULL
+        GROUP BY 1, 2
+    """)
+
+
+MIGRATIONS = [
+    (1, "base tables", base_tables),
+    (2, "sale_items", sale_items),
+    (3, "daily_sales_summary", daily_sales_summary),
+    (4, "products_fts", products_fts),
+    (5, "lookup indexes", lookup_indexes),
+    (6, "typed sales storage", typed_sales),
+    (7, "conversion_rates", conversion_rates),
+    (8, "product_daily_sales", product_daily_sales),
+]
+
+_lock = threading.Lock()
+
+
+def applied_versions(conn):
+    return {row[0] for row in conn.execute("SELECT version FROM schema_version")}
+
+
+def _create_version_table(conn):
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version(
+            version INTEGER PRIMARY KEY,
+            name TEXT,
+            applied_at TEXT
+        )
+        ''')
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def migrate(conn):
+    """
+    Apply all pending migrations. Safe to call from several threads or processes at once:
+    a process-wide lock serializes threads and BEGIN IMMEDIATE serializes processes.
+    Returns: the versions applied by this call.
+    """
+    applied_now = []
+    with _lock:
+        _create_version_table(conn)
+        for version, name, migration in MIGRATIONS:
+            if version in applied_versions(conn):
+                continue
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Another process may have applied it while we waited for the write lock
+                if version in applied_versions(conn):
+                    conn.rollback()
+                    continue
+                if migration(conn.cursor()) is False:
+                    conn.rollback()
+                    continue
+                conn.execute(
+                    "INSERT INTO schema_version (version,name,applied_at) VALUES (?,?,?)",
+                    (version, name, datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+                )
+                conn.commit()
+                applied_now.append(version)
+            except Exception:
+                conn.rollback()
+                raise
+    return applied_now
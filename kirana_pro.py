@@ -4,16 +4,37 @@ import pandas as pd
 import numpy as np
 import sqlite3
 import os
+import threading
+import time
+import kirana_core as core
+import kirana_metrics as metrics
 from datetime import datetime
-from fpdf import FPDF
 from io import BytesIO
-import json
-from weasyprint import HTML , CSS
-import tempfile
-from groq import Groq
-import seaborn as sns
-import matplotlib.pyplot as plt
-import squarify
+from collections import OrderedDict
+from kirana_currency import CurrencyFormatter
+from kirana_export import EXPORT_FORMATS, export_query, parquet_available
+from kirana_core import (
+    ConnectionPool, Database, OutOfStockError, EXPORT_TABLES, has_fts, export_table_query,
+    complete_sale, count_undated_sales, delete_products, delete_sales, rebuild_daily_sales_summary,
+    fetch_conversion_rates, fetch_daily_sales, fetch_product_sales, fetch_products, fetch_products_page,
+    fetch_sale_items, fetch_sales_date_bounds, fetch_sales_page, fetch_sales_range_total,
+    fetch_sales_summary, fetch_top_products, search_product_ids,
+)
+from kirana_import import count_rows, import_products, read_chunks
+from kirana_invoice import INVOICE_LABELS, InvoiceQueue, build_invoice_html
+from kirana_metrics import MetricsExporter, span
+from kirana_migrations import migrate
+from kirana_translations import translations
+
+RERUN_STARTED = time.perf_counter()
+metrics.set_page("setup")  # spans before the page is known
+
+# Admins profile one rerun from the Profiler panel, or every rerun with ?profile=1 in the URL.
+# The sampler ends by itself however the rerun ends (st.rerun, st.stop, an exception).
+rerun_profiler = None
+if st.session_state.get("admin") and (st.session_state.pop("profile_next_rerun", False) or st.query_params.get("profile")):
+    rerun_profiler = metrics.StackSampler().start()
+    st.session_state["rerun_profile"] = {"sampler": rerun_profiler, "page": "setup", "at": datetime.now()}
 
 # ----- Page Config -----
 st.set_page_config(page_title="Sales Stock", layout="wide")
@@ -63,36 +84,15 @@ currency = selected_label.split()[-2] + " " + selected_label.split()[-1] \
 
 # Clean names will now be:
 # PKR, German Euro, French Euro, Spanish Euro, Arabic Riyal
+# Their rates and symbols live in the conversion_rates table (see Currency Formatting below)
 
-# Conversion Rates (Base = PKR)
-conversion_rates = {
-    "PKR": 1,
-    "German Euro": 1/350,
-    "French Euro": 1/350,
-    "Spanish Euro": 1/350,
-    "Arabic Riyal": 0.087
-}
-
-# Currency Format Function
-def format_currency(x):
-    try:
-        rate = conversion_rates.get(currency, 1)
-        converted = float(x) * rate
-        
-        if currency == "PKR":
-            return f"Rs {converted:,.2f}"
-        elif currency in ["German Euro", "French Euro", "Spanish Euro"]:
-            return f"€ {converted:,.2f}"
-        elif currency == "Arabic Riyal":
-            return f"﷼ {converted:,.2f}"
-        else:
-            return f"{converted:,.2f}"
-    except:
-        return str(x)
 
+# AI ChatBot client, created once per process on first use
+@st.cache_resource(show_spinner=False)
+def groq_client():
+    from groq import Groq
+    return Groq(api_key=st.secrets["GROQ_API_KEY"])
 
-# AI ChatBot
-client = Groq(api_key=st.secrets["GROQ_API_KEY"])
 # ==== Sidebar Chatbot ====
 st.sidebar.subheader("🧠 Personal Assistant")
 # User input
@@ -100,10 +100,11 @@ user_msg = st.sidebar.text_input("Ask something…")
 if st.sidebar.button("Send"):
     if user_msg.strip():
         # Single-turn chat (no history)
-        response = client.chat.completions.create(
-            model="llama-3.1-8b-instant",
-            messages=[{"role": "user", "content": user_msg}]
-        )
+        with span("groq.chat"):
+            response = groq_client().chat.completions.create(
+                model="llama-3.1-8b-instant",
+                messages=[{"role": "user", "content": user_msg}]
+            )
         bot_reply = response.choices[0].message.content
         # Display user and bot messages
         st.sidebar.write("🧑‍💻 You: " + user_msg)
@@ -115,592 +116,216 @@ DB_PATH = "data/kirana.db"
 INVOICE_DIR = "invoices"
 LOGO_PATH = "assets/shop_logo.png"
 
-os.makedirs("data", exist_ok=True)
-os.makedirs(INVOICE_DIR, exist_ok=True)
-os.makedirs("assets", exist_ok=True)
+@st.cache_resource
+def prepare_directories():
+    for path in ("data", INVOICE_DIR, "assets"):
+        os.makedirs(path, exist_ok=True)
 
-# ----- SQLite Connection -----
-conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-c = conn.cursor()
+prepare_directories()
 
-# ----- Translations -----
-translations = {
-    "Kirana POS": {
-        "English":"Kirana POS", 
-        "Urdu":"کرانہ POS", 
-        "German":"Kirana POS", 
-        "French": "Kirana POS", 
-        "Spanish": "Kirana POS", 
-        "Arabic": "كيران POS"
-    },
-    "Dashboard": {
-        "English":"Dashboard", 
-        "Urdu":"ڈیش بورڈ", 
-        "German":"Dashboard", 
-        "French": "Tableau de bord", 
-        "Spanish": "Tablero", 
-        "Arabic": "لوحة القيادة"
-    },
-    "Inventory": {
-        "English":"Inventory", 
-        "Urdu":"انوینٹری", 
-        "German":"Inventar", 
-        "French": "Inventaire", 
-        "Spanish": "Inventario", 
-        "Arabic": "المخزون"
-    },
-    "Billing / POS": {
-        "English":"Billing / POS", 
-        "Urdu":"بلنگ / POS", 
-        "German":"Abrechnung / POS", 
-        "French": "Facturation / POS", 
-        "Spanish": "Facturación / POS", 
-        "Arabic": "الفوترة / نقطة البيع"
-    },
-    "Sales Report": {
-        "English":"Sales Report", 
-        "Urdu":"سیلز رپورٹ", 
-        "German":"Verkaufsbericht", 
-        "French": "Rapport des ventes", 
-        "Spanish": "Informe de ventas", 
-        "Arabic": "تقرير المبيعات"
-    },
-    "Visualizations": {
-    "English": "Visualizations",
-    "Urdu": "بصری خاکے",
-    "German": "Visualisierungen",
-    "French": "Visualisations",
-    "Spanish": "Visualizaciones",
-    "Arabic": "الرسوم البيانية"
-    },
-    "Select Chart": {
-    "English": "Select Chart",
-    "Urdu": "چارٹ منتخب کریں",
-    "German": "Diagramm auswählen",
-    "French": "Sélectionner un graphique",
-    "Spanish": "Seleccionar gráfico",
-    "Arabic": "اختر المخطط"
-    },
-    "Histogram": {
-    "English": "Histogram",
-    "Urdu": "ہسٹگرام",
-    "German": "Histogramm",
-    "French": "Histogramme",
-    "Spanish": "Histograma",
-    "Arabic": "مدرج تكراري"
-    },
-    "Box Plot": {
-    "English": "Box Plot",
-    "Urdu": "باکس پلاٹ",
-    "German": "Boxplot",
-    "French": "Boîte à moustaches",
-    "Spanish": "Diagrama de caja",
-    "Arabic": "مخطط الصندوق"
-    },
-    "Area Chart": {
-    "English": "Area Chart",
-    "Urdu": "ایریا چارٹ",
-    "German": "Flächendiagramm",
-    "French": "Graphique en aires",
-    "Spanish": "Gráfico de área",
-    "Arabic": "مخطط المساحة"
-    },
-    "Donut Chart": {
-    "English": "Donut Chart",
-    "Urdu": "ڈونٹ چارٹ",
-    "German": "Donut-Diagramm",
-    "French": "Graphique en anneau",
-    "Spanish": "Gráfico de dona",
-    "Arabic": "مخطط الدونات"
-    },
-    "Bubble Chart": {
-    "English": "Bubble Chart",
-    "Urdu": "ببل چارٹ",
-    "German": "Blasendiagramm",
-    "French": "Graphique à bulles",
-    "Spanish": "Gráfico de burbujas",
-    "Arabic": "مخطط الفقاعات"
-    },
-    "Tree Map": {
-    "English": "Tree Map",
-    "Urdu": "ٹری میپ",
-    "German": "Baumkarte",
-    "French": "Carte arborescente",
-    "Spanish": "Mapa de árbol",
-    "Arabic": "خريطة شجرية"
-    },
-    "Bubble Chart (Qty vs Price with Size = Amount)": {
-    "English": "Bubble Chart (Quantity vs Price with Size = Amount)",
-    "Urdu": "ببل چارٹ (مقدار بمقابلہ قیمت، سائز = رقم)",
-    "German": "Blasendiagramm (Menge vs Preis, Größe = Betrag)",
-    "French": "Graphique à bulles (Quantité vs Prix, Taille = Montant)",
-    "Spanish": "Gráfico de burbujas (Cantidad vs Precio, Tamaño = Monto)",
-    "Arabic": "مخطط الفقاعات (الكمية مقابل السعر، الحجم = المبلغ)"
-    },
-    "Donut Chart of Top Products": {
-    "English": "Donut Chart of Top Products",
-    "Urdu": "بہترین مصنوعات کا ڈونٹ چارٹ",
-    "German": "Donut-Diagramm der Top-Produkte",
-    "French": "Graphique en anneau des meilleurs produits",
-    "Spanish": "Gráfico de dona de los productos principales",
-    "Arabic": "مخطط الدونات لأفضل المنتجات"
-    },
-    "Histogram (Price Distribution)": {
-    "English": "Histogram (Price Distribution)",
-    "Urdu": "ہسٹگرام (قیمت کی تقسیم)",
-    "German": "Histogramm (Preisverteilung)",
-    "French": "Histogramme (Répartition des prix)",
-    "Spanish": "Histograma (Distribución de precios)",
-    "Arabic": "مدرج تكراري (توزيع الأسعار)"
-    },
-    "Box Plot (Price Outliers)": {
-    "English": "Box Plot (Price Outliers)",
-    "Urdu": "باکس پلاٹ (قیمت کے آؤٹ لائرز)",
-    "German": "Boxplot (Preis-Ausreißer)",
-    "French": "Boîte à moustaches (Valeurs aberrantes de prix)",
-    "Spanish": "Diagrama de caja (Valores atípicos del precio)",
-    "Arabic": "مخطط الصندوق (القيم الشاذة للسعر)"
-    },
-    "Area Chart (Sales Over Time)": {
-    "English": "Area Chart (Sales Over Time)",
-    "Urdu": "ایریا چارٹ (وقت کے ساتھ فروخت)",
-    "German": "Flächendiagramm (Verkäufe im Zeitverlauf)",
-    "French": "Graphique en aires (Ventes dans le temps)",
-    "Spanish": "Gráfico de área (Ventas a lo largo del tiempo)",
-    "Arabic": "مخطط المساحة (المبيعات بمرور الوقت)"
-    },
-    "Tree Map of Top Products": {
-    "English": "Tree Map of Top Products",
-    "Urdu": "بہترین مصنوعات کی ٹری میپ",
-    "German": "Baumkarte der Top-Produkte",
-    "French": "Carte arborescente des meilleurs produits",
-    "Spanish": "Mapa de árbol de los productos principales",
-    "Arabic": "خريطة شجرية لأفضل المنتجات"
-    },
-    "Top Products (Horizontal Bar Chart)": {
-    "English": "Top Products (Horizontal Bar Chart)",
-    "Urdu": "سب سے بہترین مصنوعات (افقی بار چارٹ)",
-    "German": "Top-Produkte (horizontales Balkendiagramm)",
-    "French": "Meilleurs produits (diagramme à barres horizontal)",
-    "Spanish": "Productos principales (gráfico de barras horizontal)",
-    "Arabic": "أفضل المنتجات (مخطط شريطي أفقي)"
-    },
-    "Scatter Plot (Quantity vs Price)": {
-    "English": "Scatter Plot (Quantity vs Price)",
-    "Urdu": "اسکیٹر پلاٹ (مقدار بمقابلہ قیمت)",
-    "German": "Streudiagramm (Menge vs Preis)",
-    "French": "Diagramme de dispersion (Quantité vs Prix)",
-    "Spanish": "Gráfico de dispersión (Cantidad vs Precio)",
-    "Arabic": "مخطط مبعثر (الكمية مقابل السعر)"
-    },
-
-    "Violin Plot (Price Distribution)": {
-    "English": "Violin Plot (Price Distribution)",
-    "Urdu": "وائلن پلاٹ (قیمت کی تقسیم)",
-    "German": "Violindiagramm (Preisverteilung)",
-    "French": "Graphique en violon (Distribution des prix)",
-    "Spanish": "Gráfico de violín (Distribución de precios)",
-    "Arabic": "مخطط الكمان (توزيع الأسعار)"
-    },
-    "Correlation Heatmap": {
-    "English": "Correlation Heatmap",
-    "Urdu": "تعلقات کی ہیٹ میپ",
-    "German": "Korrelations-Heatmap",
-    "French": "Carte thermique des corrélations",
-    "Spanish": "Mapa de calor de correlación",
-    "Arabic": "خريطة الحرارة للترابط"
-    },
-
-    "Pie Chart of Top Products": {
-    "English": "Pie Chart of Top Products",
-    "Urdu": "بہترین مصنوعات کا پائی چارٹ",
-    "German": "Kreisdiagramm der Top-Produkte",
-    "French": "Diagramme circulaire des meilleurs produits",
-    "Spanish": "Gráfico circular de los productos principales",
-    "Arabic": "مخطط دائري لأفضل المنتجات"
-    },
-    "Quantity": {
-    "English": "Quantity",
-    "Urdu": "مقدار",
-    "German": "Menge",
-    "French": "Quantité",
-    "Spanish": "Cantidad",
-    "Arabic": "الكمية"
-    },
-    "Price": {
-    "English": "Price",
-    "Urdu": "قیمت",
-    "German": "Preis",
-    "French": "Prix",
-    "Spanish": "Precio",
-    "Arabic": "السعر"
-    },
-    "WelcomeTitle": {
-    "English": "✨ Welcome to Kirana Pro",
-    "Urdu": "✨ Kirana Pro میں خوش آمدید",
-    "German": "✨ Willkommen bei Kirana Pro",
-    "French": "✨ Bienvenue sur Kirana Pro",
-    "Spanish": "✨ Bienvenido a Kirana Pro",
-    "Arabic": "✨ مرحبًا بك في Kirana Pro"
-    },
-    "No sales data to visualize.": {
-    "English": "No sales data to visualize.",
-    "Urdu": "کوئی سیل ڈیٹا موجود نہیں ہے۔",
-    "German": "Keine Verkaufsdaten zur Visualisierung.",
-    "French": "Aucune donnée de vente à visualiser.",
-    "Spanish": "No hay datos de ventas para visualizar.",
-    "Arabic": "لا توجد بيانات مبيعات للعرض."
-    },
-    "From": {
-    "English": "From",
-    "Urdu": "سے",
-    "German": "Von",
-    "French": "De",
-    "Spanish": "Desde",
-    "Arabic": "من"
-    },
-    "To": {
-    "English": "To",
-    "Urdu": "تک",
-    "German": "À",
-    "French": "À",
-    "Spanish": "Hasta",
-    "Arabic": "إلى"
-    },
-    "Sales Over Time": {
-    "English": "Sales Over Time",
-    "Urdu": "وقت کے ساتھ فروخت",
-    "German": "Verkäufe im Zeitverlauf",
-    "French": "Ventes au fil du temps",
-    "Spanish": "Ventas a lo largo del tiempo",
-    "Arabic": "المبيعات حسب الوقت"
-    },
-    "Top Selling Products": {
-    "English": "Top Selling Products",
-    "Urdu": "زیادہ فروخت ہونے والی مصنوعات",
-    "German": "Meistverkaufte Produkte",
-    "French": "Produits les plus vendus",
-    "Spanish": "Productos más vendidos",
-    "Arabic": "أفضل المنتجات مبيعًا"
-    },
-    "Could not parse items_json": {
-    "English": "Could not parse items_json",
-    "Urdu": "آئٹمز JSON کو پڑھا نہیں جا سکا",
-    "German": "items_json konnte nicht verarbeitet werden",
-    "French": "Impossible d'analyser items_json",
-    "Spanish": "No se pudo analizar items_json",
-    "Arabic": "تعذر解析 items_json"
-    },
-    "No product data found.": {
-    "English": "No product data found.",
-    "Urdu": "کوئی پراڈکٹ ڈیٹا نہیں ملا۔",
-    "German": "Keine Produktdaten gefunden.",
-    "French": "Aucune donnée produit trouvée.",
-    "Spanish": "No se encontraron datos de productos.",
-    "Arabic": "لم يتم العثور على بيانات المنتجات."
-    },
-    "Data Import/Export": {
-        "English":"Data Import/Export", 
-        "Urdu":"ڈیٹا درآمد/برآمد", 
-        "German":"Daten Import/Export", 
-        "French": "Import/Export de données", 
-        "Spanish": "Importación/Exportación de datos", 
-        "Arabic": "استيراد/تصدير البيانات"
-    },
-    "Help": {
-        "English":"Help", 
-        "Urdu":"مدد", 
-        "German":"Hilfe", 
-        "French": "Aide", 
-        "Spanish": "Ayuda", 
-        "Arabic": "مساعدة"
-    },
-    "Add Product": {
-        "English":"Add Product ➕", 
-        "Urdu":"مصنوعات شامل کریں ➕", 
-        "German":"Produkt hinzufügen ➕", 
-        "French": "Ajouter un produit ➕", 
-        "Spanish": "Agregar producto ➕", 
-        "Arabic": "أضف منتج ➕"
-    },
-    "Customer Name": {
-        "English":"Customer name (optional)", 
-        "Urdu":"صارف کا نام (اختیاری)", 
-        "German":"Kundenname (optional)", 
-        "French": "Nom du client (optionnel)", 
-        "Spanish": "Nombre del cliente (opcional)", 
-        "Arabic": "اسم العميل (اختياري)"
-    },
-    "Payment Method": {
-        "English":"Payment method", 
-        "Urdu":"ادائیگی کا طریقہ", 
-        "German":"Zahlungsmethode", 
-        "French": "Mode de paiement", 
-        "Spanish": "Método de pago", 
-        "Arabic": "طريقة الدفع"
-    },
-    "Notes": {
-        "English":"Notes (optional)", 
-        "Urdu":"نوٹس (اختیاری)", 
-        "German":"Notizen (optional)", 
-        "French": "Notes (optionnel)", 
-        "Spanish": "Notas (opcional)", 
-        "Arabic": "ملاحظات (اختياري)"
-    },
-    "Stock": {
-        "English":"Stock", 
-        "Urdu":"اسٹاک", 
-        "German":"Bestand", 
-        "French": "Stock", 
-        "Spanish": "Inventario", 
-        "Arabic": "المخزون"
-    },
-    "Total Sales": {
-        "English":"Total Sales", 
-        "Urdu":"کل فروخت", 
-        "German":"Gesamtverkauf", 
-        "French": "Ventes totales", 
-        "Spanish": "Ventas totales", 
-        "Arabic": "إجمالي المبيعات"
-    },
-    "Cart": {
-        "English":"Cart", 
-        "Urdu":"کارٹ", 
-        "German":"Warenkorb", 
-        "French": "Panier", 
-        "Spanish": "Carrito", 
-        "Arabic": "عربة التسوق"
-    },
-    "Complete Sale": {
-        "English":"Complete Sale ✅", 
-        "Urdu":"سیل مکمل کریں ✅", 
-        "German":"Verkauf abschließen ✅", 
-        "French": "Vente terminée ✅", 
-        "Spanish": "Venta completada ✅", 
-        "Arabic": "اكتمال البيع ✅"
-    },
-    "Search Product": {
-        "English":"Search product name or barcode", 
-        "Urdu":"مصنوعات کا نام یا بارکوڈ تلاش کریں", 
-        "German":"Produktname oder Barcode suchen", 
-        "French": "Rechercher produit ou code-barres", 
-        "Spanish": "Buscar producto o código", 
-        "Arabic": "ابحث عن المنتج أو الباركود"
-    },
-    "Delete Product": {
-        "English":"Delete", 
-        "Urdu":"حذف کریں", 
-        "German":"Löschen", 
-        "French": "Supprimer", 
-        "Spanish": "Eliminar", 
-        "Arabic": "حذف"
-    },
-    "No Products": {
-        "English":"No products in inventory.", 
-        "Urdu":"انوینٹری میں کوئی مصنوعات نہیں۔", 
-        "German":"Keine Produkte im Inventar.", 
-        "French": "Aucun produit en stock.", 
-        "Spanish": "No hay productos en inventario.", 
-        "Arabic": "لا توجد منتجات في المخزون."
-    },
-    "No Sales": {
-        "English":"No sales yet.", 
-        "Urdu":"ابھی تک کوئی فروخت نہیں ہوئی۔", 
-        "German":"Noch keine Verkäufe.", 
-        "French": "Aucune vente pour le moment.", 
-        "Spanish": "No hay ventas todavía.", 
-        "Arabic": "لا توجد مبيعات حتى الآن."
-    },
-    "Low Stock Threshold": {
-        "English":"Low stock threshold", 
-        "Urdu":"کم اسٹاک حد", 
-        "German":"Niedriges Bestandslimit", 
-        "French": "Seuil de stock faible", 
-        "Spanish": "Umbral de stock bajo", 
-        "Arabic": "حد المخزون المنخفض"
-    },
-    "Cart Empty": {
-        "English":"Cart is empty. Add products from left.", 
-        "Urdu":"کارٹ خالی ہے۔ بائیں جانب سے مصنوعات شامل کریں۔", 
-        "German":"Warenkorb ist leer. Produkte von links hinzufügen.", 
-        "French": "Le panier est vide. Ajoutez des produits à gauche.", 
-        "Spanish": "El carrito está vacío. Agregue productos desde la izquierda.", 
-        "Arabic": "السلة فارغة. أضف المنتجات من اليسار."
-    },
-    "Subtotal": {
-        "English":"Subtotal", 
-        "Urdu":"ذیلی کل", 
-        "German":"Zwischensumme", 
-        "French": "Sous-total", 
-        "Spanish": "Subtotal", 
-        "Arabic": "المجموع الجزئي"
-    },
-    "Discount": {
-        "English":"Discount", 
-        "Urdu":"رعایت", 
-        "German":"Rabatt", 
-        "French": "Remise", 
-        "Spanish": "Descuento", 
-        "Arabic": "خصم"
-    },
-    "Total": {
-        "English":"Total", 
-        "Urdu":"کل", 
-        "German":"Gesamt", 
-        "French": "Total", 
-        "Spanish": "Total", 
-        "Arabic": "الإجمالي"
-    },
-    "Notes Label": {
-        "English":"Notes", 
-        "Urdu":"نوٹس", 
-        "German":"Notizen", 
-        "French": "Notes", 
-        "Spanish": "Notas", 
-        "Arabic": "ملاحظات"
-    },
-    "Download Invoice PDF": {
-        "English":"⬇ Download Invoice (PDF)", 
-        "Urdu":"⬇ انوائس ڈاؤن لوڈ کریں (PDF)", 
-        "German":"⬇ Rechnung herunterladen (PDF)", 
-        "French": "⬇ Télécharger la facture (PDF)", 
-        "Spanish": "⬇ Descargar factura (PDF)", 
-        "Arabic": "⬇ تحميل الفاتورة (PDF)"
-    },
-    "Download Invoice HTML": {
-        "English":"⬇ Download Invoice (HTML)", 
-        "Urdu":"⬇ انوائس ڈاؤن لوڈ کریں (HTML)", 
-        "German":"⬇ Rechnung herunterladen (HTML)", 
-        "French": "⬇ Télécharger la facture (HTML)", 
-        "Spanish": "⬇ Descargar factura (HTML)", 
-        "Arabic": "⬇ تحميل الفاتورة (HTML)"
-    },
-    "Download Items CSV": {
-        "English":"⬇ Download Items CSV", 
-        "Urdu":"⬇ اشیاء CSV ڈاؤن لوڈ کریں", 
-        "German":"⬇ Artikel CSV herunterladen", 
-        "French": "⬇ Télécharger les articles CSV", 
-        "Spanish": "⬇ Descargar artículos CSV", 
-        "Arabic": "⬇ تحميل العناصر CSV"
-    },
-}
+# ----- SQLite Connection Pool (see kirana_core) -----
+@st.cache_resource
+def connection_pool():
+    return ConnectionPool(DB_PATH)
+
+conn = connection_pool().get()
+
+# ----- Shared Read Cache -----
+# Reads are cached for all sessions and keyed on the database version, which the pool's
+# monitor connection sees change on every commit, from this process or any other.
+def db_version():
+    return connection_pool().data_version()
+
+def commit():
+    """Commit the current thread's connection; cached reads see the new db_version()."""
+    conn.commit()
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def cached_read_sql(query, params, version):
+    with span("read_sql"):
+        return pd.read_sql(query, conn, params=params)
+
+def read_sql(query, params=()):
+    return cached_read_sql(query, tuple(params), db_version())
 
+class CachedDatabase(Database):
+    """The core's Database with reads served from the shared cache."""
+    def read_sql(self, query, params=()):
+        return read_sql(query, params)
+
+# Every core function takes this thread's db as its first argument
+db = CachedDatabase(conn)
+c = db.c
+
+# ----- Translations -----
 
 def tr(key):
     return translations.get(key, {}).get(language, key)
 
 st.title(tr("WelcomeTitle"))
 
-# ----- Create Tables -----
-c.execute('''
-CREATE TABLE IF NOT EXISTS products(
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    barcode TEXT,
-    name TEXT,
-    category TEXT,
-    cost_price REAL,
-    sale_price REAL,
-    stock REAL
-)
-''')
-
-c.execute('''
-CREATE TABLE IF NOT EXISTS sales(
-    sale_id INTEGER PRIMARY KEY AUTOINCREMENT,
-    date TEXT,
-    total_amount REAL,
-    items_json TEXT,
-    payment_method TEXT,
-    customer TEXT,
-    notes TEXT
-)
-''')
-conn.commit()
+# ----- Schema (versioned migrations, applied once per process) -----
+@st.cache_resource(show_spinner=False)
+def init_schema():
+    """Apply pending migrations. Returns: whether FTS5 product search is available."""
+    migrate(conn)
+    return has_fts(conn)
 
-# ----- Helper Functions -----
-def fetch_products():
-    try:
-        return pd.read_sql("SELECT * FROM products", conn)
-    except:
-        return pd.DataFrame(columns=['id','barcode','name','category','cost_price','sale_price','stock'])
+FTS_ENABLED = init_schema()
 
-def fetch_sales():
-    try:
-        return pd.read_sql("SELECT * FROM sales", conn)
-    except:
-        return pd.DataFrame(columns=['sale_id','date','total_amount','items_json','payment_method','customer','notes'])
+# ----- Currency Formatting -----
+
+@st.cache_resource(max_entries=16, show_spinner=False)
+def currency_formatter(rate, symbol):
+    return CurrencyFormatter(rate, symbol)
+
+def selected_currency_formatter():
+    """Formatter for the sidebar currency; unknown currencies are shown unconverted without a symbol."""
+    rates = fetch_conversion_rates(db).set_index("currency")
+    if currency not in rates.index:
+        return currency_formatter(1.0, "")
+    return currency_formatter(float(rates.at[currency, "rate"]), rates.at[currency, "symbol"] or "")
 
+# format_currency(x) formats one amount, format_currency.series(col) a whole column
+format_currency = selected_currency_formatter()
 
+def format_money_columns(df, columns):
+    """Copy of df with the given money columns converted and formatted in the selected currency."""
+    return df.assign(**{col: format_currency.series(df[col]) for col in columns if col in df})
 
+# ----- Product Index -----
+@st.cache_resource(max_entries=2, show_spinner=False)
+def build_product_index(version):
+    """The POS lookup tables, built once per database version and shared by all sessions."""
+    return core.build_product_index(db)
 
+def product_index():
+    return build_product_index(db_version())
 
-def generate_invoice_pdf(sale_id, items, total, discount, customer="", payment_method="Cash", notes=""):
+# ----- Chart Render Cache -----
+class ChartCache:
+    """
+    Rendered chart images (PNG bytes) shared by all sessions. The least recently shown
+    charts are evicted once the images together take more than max_bytes.
+    """
+    def __init__(self, max_bytes=32 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.images = OrderedDict()  # key -> PNG bytes
+        self.size = 0
+
+    def get(self, key):
+        with self.lock:
+            image = self.images.get(key)
+            if image is not None:
+                self.images.move_to_end(key)
+            return image
+
+    def put(self, key, image):
+        with self.lock:
+            old = self.images.pop(key, None)
+            if old is not None:
+                self.size -= len(old)
+            self.images[key] = image
+            self.size += len(image)
+            while self.size > self.max_bytes and len(self.images) > 1:
+                self.size -= len(self.images.popitem(last=False)[1])
+
+@st.cache_resource
+def chart_cache():
+    return ChartCache()
+
+def show_chart(key, draw):
+    """
+    Show a matplotlib chart drawn by draw(ax) on fresh axes. The PNG is cached under key,
+    (chart, d1, d2, language, db version).
     """
-    Generate invoice PDF using WeasyPrint (supports Unicode fully).
-    Returns: Path to the generated PDF.
+    image = chart_cache().get(key)
+    if image is None:
+        # Plotting libraries are only loaded when a chart has to be drawn
+        from matplotlib.figure import Figure
+        # A standalone Figure rather than pyplot, whose global figure state is shared by all
+        # sessions' threads; nothing registers it, so it is freed without plt.close
+        fig = Figure()
+        ax = fig.subplots()
+        with span("chart.render"):
+            draw(ax)
+            buffer = BytesIO()
+            fig.savefig(buffer, format="png", bbox_inches="tight")
+            image = buffer.getvalue()
+        chart_cache().put(key, image)
+    st.image(image, width="stretch")
+
+# ----- Paginated Lists -----
+PAGE_SIZES = [25, 50, 100, 200]
+
+def keyset_pager(key, fetch_page, cursor_columns, filters=()):
     """
-    # Create HTML content
-    items_rows = ""
-    for item in items:
-        name = str(item.get('name', ''))[:40]
-        qty = int(item.get('qty', 0))
-        price = float(item.get('price', 0.0))
-        line_total = price * qty
-        items_rows += f"""
-        <tr>
-            <td>{name}</td>
-            <td style="text-align:center">{qty}</td>
-            <td style="text-align:right">{price:.2f}</td>
-            <td style="text-align:right">{line_total:.2f}</td>
-        </tr>
-        """
-
-    logo_html = ""
-    if os.path.exists(LOGO_PATH):
-        logo_html = f'<img src="{LOGO_PATH}" style="width:100px; float:right;">'
-
-    html_content = f"""
-    <html>
-    <head>
-    <meta charset="utf-8">
-    <style>
-        body {{ font-family: Arial, sans-serif; font-size: 12px; }}
-        table {{ border-collapse: collapse; width: 100%; margin-top: 10px; }}
-        th, td {{ border: 1px solid #333; padding: 5px; }}
-        th {{ background-color: #f2f2f2; }}
-        h1 {{ text-align: center; }}
-    </style>
-    </head>
-    <body>
-        {logo_html}
-        <h1>Shop Invoice</h1>
-        <p><strong>Invoice ID:</strong> {sale_id}</p>
-        <p><strong>Date:</strong> {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>
-        {"<p><strong>Customer:</strong> "+customer+"</p>" if customer else ""}
-        <p><strong>Payment Method:</strong> {payment_method}</p>
-
-        <table>
-            <tr>
-                <th>{tr('Add Product')}</th>
-                <th>Qty</th>
-                <th>{tr('Total')}</th>
-                <th>{tr('Subtotal')}</th>
-            </tr>
-            {items_rows}
-        </table>
-
-        <p><strong>{tr('Discount')}:</strong> {format_currency(discount)}</p>
-        <p><strong>{tr('Total')}:</strong> {format_currency(total)}</p>
-        {"<p><strong>"+tr('Notes Label')+":</strong> "+notes+"</p>" if notes else ""}
-    </body>
-    </html>
+    Page-size selector and Prev/Next buttons for a keyset-paginated list.
+    fetch_page(cursor, limit) returns the rows after cursor, where cursor is the last row's value of
+    cursor_columns (a tuple when it is a list). The cursor stack lives in session_state and is reset
+    whenever filters or the page size change. Returns: the current page.
     """
+    page_size = st.selectbox("Rows per page", PAGE_SIZES, index=1, key=f"{key}_page_size")
+    if st.session_state.get(f"{key}_filters") != (filters, page_size):
+        st.session_state[f"{key}_filters"] = (filters, page_size)
+        st.session_state[f"{key}_cursors"] = [None]
+    cursors = st.session_state[f"{key}_cursors"]
+
+    page_df = fetch_page(cursors[-1], page_size + 1)  # one extra row tells us if there is a next page
+    has_next = len(page_df) > page_size
+    page_df = page_df.head(page_size)
+
+    prev_col, info_col, next_col = st.columns([1, 2, 1])
+    if prev_col.button("◀ Prev", key=f"{key}_prev", disabled=len(cursors) == 1):
+        cursors.pop()
+        st.rerun()
+    info_col.caption(f"Page {len(cursors)}")
+    if next_col.button("Next ▶", key=f"{key}_next", disabled=not has_next):
+        if isinstance(cursor_columns, list):
+            cursors.append(tuple(page_df[col].iloc[-1].item() for col in cursor_columns))
+        else:
+            cursors.append(page_df[cursor_columns].iloc[-1].item())
+        st.rerun()
+    return page_df
 
-    # Save PDF to invoices folder
-    invoice_file = os.path.join(INVOICE_DIR, f"invoice_{sale_id}.pdf")
-    HTML(string=html_content).write_pdf(invoice_file)
+def selectable_table(key, page_df, id_column, delete_fn, label):
+    """
+    Show a page as one multi-row-selectable table with a bulk 'Delete selected' button.
+    key is the keyset_pager's key: the table key changes with the page, page size and filters,
+    because a selection is row positions and must not carry over to other rows.
+    """
+    view = (
+        st.session_state.get(f"{key}_table_version", 0),
+        len(st.session_state.get(f"{key}_cursors", [None])),
+        st.session_state.get(f"{key}_filters"),
+    )
+    table_key = f"{key}_table_{view}"
+    event = st.dataframe(page_df, key=table_key, on_select="rerun", selection_mode="multi-row", hide_index=True)
+    selected = page_df.iloc[event.selection.rows][id_column].tolist()
+    if st.button(f"❌ Delete selected ({len(selected)})", key=f"{key}_delete", disabled=not selected):
+        try:
+            delete_fn(selected)
+            # A new table key clears the selection of the rows that no longer exist
+            st.session_state[f"{key}_table_version"] = st.session_state.get(f"{key}_table_version", 0) + 1
+            st.session_state[f"{key}_deleted"] = f"{len(selected)} {label} deleted!"
+            st.rerun()
+        except Exception as e:
+            st.error(f"Error deleting {label}: {e}")
+    if f"{key}_deleted" in st.session_state:
+        st.success(st.session_state.pop(f"{key}_deleted"))
 
-    return invoice_file
+
+def invoice_html(sale_id, items, total, discount, customer="", payment_method="Cash", notes="", sale_date=None):
+    return build_invoice_html(
+        sale_id, items, total, discount, customer, payment_method, notes,
+        labels={key: tr(key) for key in INVOICE_LABELS}, money=format_currency, logo_path=LOGO_PATH,
+        sale_date=sale_date
+    )
+
+@st.cache_resource
+def invoice_queue():
+    return InvoiceQueue(INVOICE_DIR)
 
 
 # ----- Sidebar -----
@@ -718,28 +343,103 @@ page = st.sidebar.radio(
     ]
 )
 
+# Spans from here on are labelled with the page, in English whatever the UI language
+PAGE_NAMES = {
+    "📊": "Dashboard", "📦": "Inventory", "🧾": "Billing / POS", "📑": "Sales Report",
+    "📈": "Visualizations", "🔄": "Data Import/Export", "❓": "Help",
+}
+metrics.set_page(PAGE_NAMES.get(page.split(" ", 1)[0], page))
+if rerun_profiler is not None:
+    st.session_state["rerun_profile"]["page"] = PAGE_NAMES.get(page.split(" ", 1)[0], page)
+
+# ----- Rerun Overhead (append ?debug=1 to the URL) -----
+rerun_setup_ms = (time.perf_counter() - RERUN_STARTED) * 1000
+metrics.REGISTRY.observe("rerun.setup", rerun_setup_ms / 1000)
+if st.query_params.get("debug"):
+    with st.sidebar.expander("⏱ Rerun overhead"):
+        st.caption(f"Setup before page render: {rerun_setup_ms:.1f} ms")
+
+# ----- Admin (append ?admin=1 to the URL; needs the optional ADMIN_PASSWORD secret) -----
+def is_admin():
+    return st.session_state.get("admin", False)
+
+if st.query_params.get("admin") and not is_admin() and st.secrets.get("ADMIN_PASSWORD"):
+    with st.sidebar.expander("🔑 Admin"):
+        admin_password = st.text_input("Admin password:", type="password", key="admin_password")
+        if st.button("Unlock admin"):
+            if admin_password == st.secrets["ADMIN_PASSWORD"]:
+                st.session_state["admin"] = True
+                st.rerun()
+            else:
+                st.warning("Incorrect password!")
+
+# ----- Timing Metrics (written to data/metrics.prom and data/metrics.db every minute) -----
+@st.cache_resource
+def metrics_exporter():
+    return MetricsExporter(
+        os.path.join("data", "metrics.prom"), os.path.join("data", "metrics.db"), interval=60
+    ).start()
+
+metrics_exporter()
+
+if is_admin():
+    with st.sidebar.expander("⏱ Timings"):
+        metrics.REGISTRY.enabled = st.toggle("Record timings", value=metrics.REGISTRY.enabled)
+        timings = pd.DataFrame(metrics.REGISTRY.summary())
+        if timings.empty:
+            st.caption("No timings recorded yet.")
+        else:
+            st.dataframe(timings, hide_index=True)
+        col1, col2 = st.columns(2)
+        if col1.button("Write now"):
+            metrics_exporter().flush()
+        if col2.button("Reset"):
+            metrics.REGISTRY.reset()
+            st.rerun()
+
+# ----- Rerun Profiler (admins) -----
+if is_admin():
+    # Filled in by end_rerun(), once this rerun's profile is complete
+    profiler_panel = st.sidebar.expander("🔬 Profiler", expanded=rerun_profiler is not None)
+    if profiler_panel.button("Profile next rerun"):
+        st.session_state["profile_next_rerun"] = True
+        st.rerun()
+
+def show_rerun_profile(profile):
+    result = profile["sampler"].result
+    if result is None:
+        profiler_panel.caption("The profiled rerun is still finishing.")
+        return
+    profiler_panel.caption(
+        f"{profile['page']}, {result['seconds'] * 1000:.0f} ms, {result['samples']} samples, at {profile['at']:%H:%M:%S}"
+    )
+    profiler_panel.dataframe(pd.DataFrame(result["functions"]), hide_index=True)
+    profiler_panel.download_button(
+        "⬇ Download stacks", result["collapsed"],
+        file_name=f"kirana_{profile['page'].split()[0].lower()}_{profile['at']:%Y%m%d_%H%M%S}.folded",
+        mime="text/plain", help="Collapsed stacks: open in speedscope, or flamegraph.pl for a flame graph"
+    )
+
+def end_rerun():
+    """Record the rerun's total time and show its profile. Called before st.stop() as well."""
+    metrics.REGISTRY.observe("rerun", time.perf_counter() - RERUN_STARTED)
+    if rerun_profiler is not None:
+        rerun_profiler.stop()
+    if is_admin() and st.session_state.get("rerun_profile"):
+        show_rerun_profile(st.session_state["rerun_profile"])
+
 # ----- Pages -----
 if page.startswith("📊"):
     st.title("📈 " + tr("Dashboard"))
 
     # ---- Fetch data ----
-    products_df = fetch_products()
-    sales_df = fetch_sales()
+    products_df = fetch_products(db)
     today = datetime.now().date()
 
-    # ----- Metrics ----
-    if not sales_df.empty:
-        # Safe date parsing
-        sales_df['date_parsed'] = pd.to_datetime(sales_df['date'], errors='coerce').dt.date
-        # Ensure numeric total_amount
-        sales_df['total_amount'] = pd.to_numeric(sales_df['total_amount'], errors='coerce').fillna(0)
-    
-        today_sales = sales_df[sales_df['date_parsed'] == today]
-        total_today = today_sales['total_amount'].sum() if not today_sales.empty else 0
-        total_sales = sales_df['total_amount'].sum()
-    else:
-        total_today = 0
-        total_sales = 0
+    # ----- Metrics (from daily rollup) ----
+    summary = fetch_sales_summary(db, today)
+    total_today = summary["total_today"]
+    total_sales = summary["total_sales"]
 
     # Inventory metric
     inventory_count = len(products_df)
@@ -760,50 +460,14 @@ if page.startswith("📊"):
     col1.metric(tr("Total Sales Today"), format_currency(total_today))
     col2.metric(tr("Inventory"), inventory_count)
     col3.metric(tr("Stock"), format_currency(total_stock))
-    col4.metric(tr("Total Sales Count"), len(sales_df))
+    col4.metric(tr("Total Sales Count"), summary["sale_count"])
 
     # ----- Recent Sales Section -----
     st.markdown("### Recent Sales")
-    if not sales_df.empty:
-        if "recent_sales" not in st.session_state:
-            st.session_state.recent_sales = sales_df.sort_values("date", ascending=False).head(100).copy()
-
-        updated_sales = st.session_state.recent_sales.copy()
-        deleted = False  # track if a row is deleted
-
-        for i, row in updated_sales.iterrows():
-            sale_id = row['sale_id']
-            with st.expander(f"{i+1}. 📅 {row.get('date','')} | 👤 {row.get('customer','')} | 💰 {format_currency(row.get('total_amount',0))}"):
-                st.write("**👤 Customer:**", row.get('customer',''))
-                st.write("**💰 Total Amount:**", format_currency(row.get('total_amount',0)))
-                st.write("**💳 Payment:**", row.get('payment_method',''))
-                st.write("**📝 Notes:**", row.get('notes',''))
-
-                # Delete button
-                if st.button("❌ Delete", key=f"delete_sale_{sale_id}"):
-                    try:
-                        c.execute("DELETE FROM sales WHERE sale_id=?", (sale_id,))
-                        conn.commit()
-                        st.success(f"Sale ID {sale_id} deleted!")
-
-                        # Remove deleted row from session_state
-                        st.session_state.recent_sales = st.session_state.recent_sales[
-                            st.session_state.recent_sales['sale_id'] != sale_id
-                        ]
-                        deleted = True  # mark deletion happened
-
-                    except Exception as e:
-                        st.error(f"Error deleting sale: {e}")
-
-        # If a deletion happened, rerun the script by using session_state trigger
-        if deleted:
-            # Increment counter to force refresh logic if needed
-            st.session_state.refresh_counter = st.session_state.get("refresh_counter", 0) + 1
-            # Stop current run; Streamlit will rerun automatically
-            st.stop()
-        # Show message if empty
-        if st.session_state.recent_sales.empty:
-            st.info(tr("No Sales"))
+    if summary["sale_count"]:
+        recent_sales = keyset_pager("recent_sales", lambda cursor, limit: fetch_sales_page(db, cursor, limit), ["ts", "sale_id"])
+        recent_sales = format_money_columns(recent_sales.drop(columns="ts"), ['total_amount'])
+        selectable_table("recent_sales", recent_sales, "sale_id", lambda ids: delete_sales(db, ids), "sale(s)")
     else:
         st.info(tr("No Sales"))
 
@@ -811,9 +475,6 @@ if page.startswith("📊"):
 elif page.startswith("📦"):
     st.title("🗂️ " + tr("Inventory"))
 
-    # Fetch products
-    products_df = fetch_products()
-
     # ----- Add Product Form -----
     st.markdown("#### " + tr("Add Product"))
     with st.form("add_product", clear_on_submit=True):
@@ -829,71 +490,34 @@ elif page.startswith("📦"):
                 "INSERT INTO products (barcode,name,category,cost_price,sale_price,stock) VALUES (?,?,?,?,?,?)",
                 (barcode or "", name, category, float(cost_price), float(sale_price), float(stock))
             )
-            conn.commit()
+            commit()
             st.success(f"{tr('Add Product')} '{name}' added!")
 
     # ----- Product List -----
     st.markdown("#### Product List")
-    products_df = fetch_products()
-
-    if not products_df.empty:
-        if "inventory_products" not in st.session_state:
-            st.session_state.inventory_products = products_df.copy()
-
-        updated_products = st.session_state.inventory_products.copy()
-        deleted = False
-
-        for i, row in updated_products.iterrows():
-            product_id = row['id']  # Assuming 'id' is primary key
-            with st.expander(f"{i+1}. {row.get('name','')} | Category: {row.get('category','')} | Stock: {row.get('stock',0)}"):
-                st.write("**Barcode:**", row.get('barcode',''))
-                st.write("**Cost Price:**", row.get('cost_price',0.0))
-                st.write("**Sale Price:**", row.get('sale_price',0.0))
-                st.write("**Stock:**", row.get('stock',0))
-
-                # ----- Delete Button -----
-                if st.button("❌ Delete", key=f"delete_product_{product_id}"):
-                    try:
-                        c.execute("DELETE FROM products WHERE id=?", (product_id,))
-                        conn.commit()
-                        st.success(f"Product '{row.get('name','')}' deleted!")
-
-                        # Update session_state
-                        st.session_state.inventory_products = st.session_state.inventory_products[
-                            st.session_state.inventory_products['id'] != product_id
-                        ]
-                        deleted = True
-
-                    except Exception as e:
-                        st.error(f"Error deleting product: {e}")
-
-        # Refresh UI safely
-        if deleted:
-            st.stop()
-
-        if st.session_state.inventory_products.empty:
-            st.info(tr("No Products"))
+    products_page = keyset_pager("inventory_products", lambda cursor, limit: fetch_products_page(db, cursor, limit), "id")
+    if not products_page.empty:
+        products_page = format_money_columns(products_page, ['cost_price', 'sale_price'])
+        selectable_table("inventory_products", products_page, "id", lambda ids: delete_products(db, ids), "product(s)")
     else:
         st.info(tr("No Products"))
 
 
 elif page.startswith("🧾"):
     st.title("💳 " + tr("Billing / POS"))
-    products_df = fetch_products()
     if 'cart' not in st.session_state:
         st.session_state.cart=[]
     cart = st.session_state.cart
     col1,col2 = st.columns([2,1])
     with col1:
         q = st.text_input(tr("Search Product"))
-        filtered = products_df.copy() if 'products_df' in locals() else fetch_products()
-        if q:
-            filtered = filtered[filtered['name'].str.contains(q,case=False,na=False) | filtered['barcode'].astype(str).str.contains(q, na=False)]
-        if not filtered.empty:
-            option = st.selectbox(tr("Add Product"), options=filtered['id'].tolist(), format_func=lambda x: f"{filtered.loc[filtered['id']==x,'name'].values[0]} (Stock: {filtered.loc[filtered['id']==x,'stock'].values[0]})")
+        index = product_index()
+        matches = search_product_ids(db, index, q, fts=FTS_ENABLED)
+        if matches:
+            option = st.selectbox(tr("Add Product"), options=matches, format_func=index["labels"].__getitem__)
             qty = st.number_input("Quantity",1,step=1)
             if st.button("➕ Add to Cart"):
-                prod = filtered[filtered['id']==option].iloc[0]
+                prod = index["by_id"][option]
                 cart.append({"id":int(prod['id']),"name":prod['name'],"qty":qty,"price":float(prod['sale_price'])})
                 st.success(f"{prod['name']} x{qty} added!")
         else:
@@ -916,133 +540,81 @@ elif page.startswith("🧾"):
             payment_method = st.selectbox(tr("Payment Method"), ["Cash","Card","Mobile"])
             notes = st.text_area(tr("Notes"))
             if st.button(tr("Complete Sale")):
-                # Deduct stock
-                products_dict = fetch_products().set_index('id').to_dict('index')
-                ok=True
-                for item in cart:
-                    pid=item['id']
-                    if float(products_dict[pid]['stock'])<item['qty']:
-                        st.error(f"Not enough stock for {products_dict[pid]['name']}")
-                        ok=False
-                        break
-                if ok:
-                    for item in cart:
-                        pid=item['id']
-                        new_stock = float(products_dict[pid]['stock']) - item['qty']
-                        c.execute("UPDATE products SET stock=? WHERE id=?",(new_stock,pid))
-                    conn.commit()
-                    c.execute("INSERT INTO sales (date,total_amount,items_json,payment_method,customer,notes) VALUES (?,?,?,?,?,?)",
-                              (datetime.now().strftime("%Y-%m-%d %H:%M:%S"),float(total),json.dumps(cart),payment_method,customer,notes))
-                    conn.commit()
-                    sale_id = c.lastrowid
-                    invoice_file = generate_invoice_pdf(sale_id, cart, total, discount_amt, customer, payment_method, notes)
-                    st.success(f"Sale completed! Invoice saved: {invoice_file}")
-                    with open(invoice_file,"rb") as f:
-                        st.download_button(tr("Download Invoice PDF"), f.read(), f"invoice_{sale_id}.pdf","application/pdf")
-                    invoice_html = f"<html><body><h2>Invoice #{sale_id}</h2></body></html>"
-                    st.download_button(tr("Download Invoice HTML"), invoice_html, f"invoice_{sale_id}.html","text/html")
-                    csv_bytes = pd.DataFrame(cart).to_csv(index=False).encode('utf-8')
-                    st.download_button(tr("Download Items CSV"), csv_bytes, f"invoice_{sale_id}_items.csv","text/csv")
+                try:
+                    sale_id = complete_sale(db, cart, total, discount_amt, payment_method, customer, notes)
+                except OutOfStockError as e:
+                    st.error(str(e))
+                else:
+                    invoice_args = (sale_id, list(cart), total, discount_amt, customer, payment_method, notes)
+                    invoice_queue().submit(sale_id, invoice_html(*invoice_args))
+                    st.session_state.last_sale = invoice_args
                     st.session_state.cart=[]
+                    st.success(f"Sale #{sale_id} completed!")
+
+        # ----- Last Sale Downloads -----
+        if "last_sale" in st.session_state:
+            sale_id, sale_cart = st.session_state.last_sale[:2]
+            queue = invoice_queue()
+            if queue.status(sale_id) is None:
+                # Not tracked any more (e.g. after a restart): render it again on demand
+                queue.submit(sale_id, invoice_html(*st.session_state.last_sale))
+
+            if queue.status(sale_id) in ("queued", "rendering"):
+                @st.fragment(run_every=1)
+                def wait_for_invoice():
+                    if queue.status(sale_id) in ("queued", "rendering"):
+                        st.info(f"⏳ Generating invoice #{sale_id}…")
+                    else:
+                        st.rerun()
+                wait_for_invoice()
+            elif queue.status(sale_id) == "failed":
+                st.error(f"Invoice generation failed: {queue.error(sale_id)}")
+            else:
+                with open(queue.invoice_file(sale_id),"rb") as f:
+                    st.download_button(tr("Download Invoice PDF"), f.read(), f"invoice_{sale_id}.pdf","application/pdf")
+            invoice_html_doc = f"<html><body><h2>Invoice #{sale_id}</h2></body></html>"
+            st.download_button(tr("Download Invoice HTML"), invoice_html_doc, f"invoice_{sale_id}.html","text/html")
+            csv_bytes = pd.DataFrame(sale_cart).to_csv(index=False).encode('utf-8')
+            st.download_button(tr("Download Items CSV"), csv_bytes, f"invoice_{sale_id}_items.csv","text/csv")
 
 elif page.startswith("📑"):
     st.title("📘 " + tr("Sales Report"))
 
     # Fetch data
-    sales_df = fetch_sales()
-    products_df = fetch_products()
+    first_day, last_day = fetch_sales_date_bounds(db)
 
     # ----- Date Filter -----
-    if not sales_df.empty:
-        sales_df['date_parsed'] = pd.to_datetime(sales_df['date'], errors='coerce')
-        d1 = st.date_input("From", sales_df['date_parsed'].min().date())
-        d2 = st.date_input("To", sales_df['date_parsed'].max().date())
-        mask = (sales_df['date_parsed'].dt.date >= d1) & (sales_df['date_parsed'].dt.date <= d2)
-        filtered = sales_df[mask].copy()
-
-        if "filtered_sales" not in st.session_state:
-            st.session_state.filtered_sales = filtered.copy()
-
-        updated_sales = st.session_state.filtered_sales.copy()
-        deleted = False
-
-        # ----- Display Sales with Delete -----
-        for i, row in updated_sales.iterrows():
-            sale_id = row['sale_id']
-            with st.expander(f"{i+1}. 📅 {row.get('date','')} | 👤 {row.get('customer','')} | 💰 {format_currency(row.get('total_amount',0))}"):
-                st.write("**Customer:**", row.get('customer',''))
-                st.write("**Total Amount:**", format_currency(row.get('total_amount',0)))
-                st.write("**Payment Method:**", row.get('payment_method',''))
-
-                # Delete Button
-                if st.button("❌ Delete", key=f"delete_sale_report_{sale_id}"):
-                    try:
-                        c.execute("DELETE FROM sales WHERE sale_id=?", (sale_id,))
-                        conn.commit()
-                        st.success(f"Sale ID {sale_id} deleted!")
-
-                        # Update session_state
-                        st.session_state.filtered_sales = st.session_state.filtered_sales[
-                        st.session_state.filtered_sales['sale_id'] != sale_id
-                        ]
-                        deleted = True
-
-                    except Exception as e:
-                        st.error(f"Error deleting sale: {e}")
-
-        # Refresh UI safely
-        if deleted:
-            st.stop()
-
-        # Display summary table
-        st.dataframe(st.session_state.filtered_sales[['sale_id','date','total_amount','payment_method','customer']])
-        st.write(tr("Total Sales")+":", format_currency(st.session_state.filtered_sales['total_amount'].sum()))
+    if first_day is not None:
+        d1 = st.date_input("From", first_day)
+        d2 = st.date_input("To", last_day)
+
+        # ----- Sales in Range (paginated, bulk delete) -----
+        report_sales = keyset_pager(
+            "report_sales", lambda cursor, limit: fetch_sales_page(db, cursor, limit, d1, d2), ["ts", "sale_id"], filters=(d1, d2)
+        )
+        report_sales = format_money_columns(report_sales.drop(columns="ts"), ['total_amount'])
+        selectable_table("report_sales", report_sales, "sale_id", lambda ids: delete_sales(db, ids), "sale(s)")
+        st.write(tr("Total Sales")+":", format_currency(fetch_sales_range_total(db, d1, d2)))
 
     else:
         st.info(tr("No Sales"))
 
+    undated = count_undated_sales(db)
+    if undated:
+        st.warning(
+            f"{undated} older sale(s) have a date that could not be read. They are kept in the "
+            "sales_undated table and left out of these reports and charts."
+        )
+
     # ----- Low Stock Section -----
     threshold = st.number_input(tr("Low Stock Threshold"), 5.0)
-    low_stock = products_df[products_df['stock'] <= threshold] if not products_df.empty else products_df
+    low_stock = keyset_pager(
+        "low_stock_products", lambda cursor, limit: fetch_products_page(db, cursor, limit, threshold), "id", filters=(threshold,)
+    )
 
     if not low_stock.empty:
-        if "low_stock_products" not in st.session_state:
-            st.session_state.low_stock_products = low_stock.copy()
-
-        updated_low_stock = st.session_state.low_stock_products.copy()
-        deleted = False
-
-        # Display low stock products with Delete button
-        for i, row in updated_low_stock.iterrows():
-            product_id = row['id']  # Assuming 'id' is primary key
-            with st.expander(f"{i+1}. {row.get('name','')} | Stock: {row.get('stock',0)} | Category: {row.get('category','')}"):
-                st.write("**Barcode:**", row.get('barcode',''))
-                st.write("**Cost Price:**", row.get('cost_price',0.0))
-                st.write("**Sale Price:**", row.get('sale_price',0.0))
-
-                # Delete Button
-                if st.button("❌ Delete", key=f"delete_low_stock_{product_id}"):
-                    try:
-                        c.execute("DELETE FROM products WHERE id=?", (product_id,))
-                        conn.commit()
-                        st.success(f"Product '{row.get('name','')}' deleted!")
-
-                        # Update session_state
-                        st.session_state.low_stock_products = st.session_state.low_stock_products[
-                        st.session_state.low_stock_products['id'] != product_id
-                        ]
-                        deleted = True
-
-                    except Exception as e:
-                        st.error(f"Error deleting product: {e}")
-
-        # Refresh UI safely
-        if deleted:
-            st.stop()
-
-        # Display final low stock table
-        st.dataframe(st.session_state.low_stock_products)
-
+        low_stock = format_money_columns(low_stock, ['cost_price', 'sale_price'])
+        selectable_table("low_stock_products", low_stock, "id", lambda ids: delete_products(db, ids), "product(s)")
     else:
         st.info(tr("No Low Stock Products"))
 
@@ -1050,39 +622,26 @@ elif page.startswith("📑"):
 elif page.startswith("📈"):
     st.title("📊 " + tr("Visualizations"))
 
-    sales_df = fetch_sales()
+    first_day, last_day = fetch_sales_date_bounds(db)
 
-    if sales_df.empty:
+    if first_day is None:
         st.info(tr("No sales data to visualize."))
+        end_rerun()
         st.stop()
 
-    # -------------------- DATE FIX --------------------
-    sales_df["date_parsed"] = pd.to_datetime(sales_df["date"], errors="coerce")
-
     col1, col2 = st.columns(2)
     with col1:
-        d1 = st.date_input(tr("From"), sales_df["date_parsed"].min().date())
+        d1 = st.date_input(tr("From"), first_day)
     with col2:
-        d2 = st.date_input(tr("To"), sales_df["date_parsed"].max().date())
-
-    mask = (sales_df["date_parsed"].dt.date >= d1) & (sales_df["date_parsed"].dt.date <= d2)
-    filtered_sales = sales_df[mask]
-
-    # -------------------- PARSE ITEMS JSON --------------------
-    all_items = []
-    for raw_json in filtered_sales["items_json"]:
-        try:
-            fixed = raw_json.replace("'", '"')
-            items = json.loads(fixed)
-            all_items.extend(items)
-        except:
-            pass
+        d2 = st.date_input(tr("To"), last_day)
 
-    items_df = pd.DataFrame(all_items)
+    # -------------------- TOP PRODUCTS (daily rollup) --------------------
+    top_sellers = fetch_top_products(db, d1, d2, 10)
 
     # -------------------- GUARD --------------------
-    if items_df.empty:
+    if top_sellers.empty:
         st.warning(tr("No product data found."))
+        end_rerun()
         st.stop()
 
     # ---------------------------------------------------------
@@ -1105,13 +664,14 @@ elif page.startswith("📈"):
     ]
 
     choice = st.selectbox(tr("Select Chart"), chart_options)
+    chart_key = (choice, d1, d2, language, db_version())
 
     # ---------------------------------------------------------
     # 1️⃣ SALES OVER TIME – LINE CHART
     # ---------------------------------------------------------
     if choice == "📈 Sales Over Time (Line Chart)":
         st.subheader("📈 " + tr("Sales Over Time"))
-        sales_over_time = filtered_sales.groupby(filtered_sales['date_parsed'].dt.date)['total_amount'].sum()
+        sales_over_time = fetch_daily_sales(db, d1, d2)
         st.line_chart(sales_over_time)
 
     # ---------------------------------------------------------
@@ -1119,7 +679,7 @@ elif page.startswith("📈"):
     # ---------------------------------------------------------
     elif choice == "📊 Top Selling Products (Bar Chart)":
         st.subheader("📊 " + tr("Top Selling Products"))
-        top_products = items_df.groupby("name")["qty"].sum().sort_values(ascending=False).head(10)
+        top_products = top_sellers.set_index("name")["qty"]
         st.bar_chart(top_products)
 
     # ---------------------------------------------------------
@@ -1127,75 +687,79 @@ elif page.startswith("📈"):
     # ---------------------------------------------------------
     elif choice == "📊 Horizontal Bar Chart":
         st.subheader("📊 " + tr("Top Products (Horizontal Bar Chart)"))
-        top_products = items_df.groupby("name")["qty"].sum().sort_values(ascending=True).head(10)
-        fig, ax = plt.subplots()
-        top_products.plot(kind="barh", ax=ax)
-        st.pyplot(fig)
+        top_products = top_sellers.set_index("name")["qty"].sort_values(ascending=True)
+        show_chart(chart_key, lambda ax: top_products.plot(kind="barh", ax=ax))
 
     # ---------------------------------------------------------
     # 4️⃣ SCATTER PLOT — Quantity vs Price
     # ---------------------------------------------------------
     elif choice == "📍 Scatter Plot":
         st.subheader("📍 " + tr("Scatter Plot (Quantity vs Price)"))
-        fig, ax = plt.subplots()
-        ax.scatter(items_df["qty"], items_df["price"])
-        ax.set_xlabel(tr("Quantity"))
-        ax.set_ylabel(tr("Price"))
-        st.pyplot(fig)
+        def draw(ax):
+            product_sales = fetch_product_sales(db, d1, d2)
+            ax.scatter(product_sales["qty"], product_sales["price"])
+            ax.set_xlabel(tr("Quantity"))
+            ax.set_ylabel(tr("Price"))
+        show_chart(chart_key, draw)
 
     # ---------------------------------------------------------
     # 5️⃣ VIOLIN PLOT — Price Distribution
     # ---------------------------------------------------------
     elif choice == "🎻 Violin Plot":
         st.subheader("🎻 " + tr("Violin Plot (Price Distribution)"))
-        fig, ax = plt.subplots()
-        sns.violinplot(data=items_df, y="price", ax=ax)
-        st.pyplot(fig)
+        def draw(ax):
+            import seaborn as sns
+            sns.violinplot(data=fetch_sale_items(db, d1, d2), y="price", ax=ax)
+        show_chart(chart_key, draw)
 
     # ---------------------------------------------------------
     # 6️⃣ HEATMAP — Correlation
     # ---------------------------------------------------------
     elif choice == "🔥 Correlation Heatmap":
         st.subheader("🔥 " + tr("Correlation Heatmap"))
-        fig, ax = plt.subplots()
-        sns.heatmap(items_df.select_dtypes(include=[np.number]).corr(), annot=True, cmap="coolwarm", ax=ax)
-        st.pyplot(fig)
+        def draw(ax):
+            import seaborn as sns
+            items_df = fetch_sale_items(db, d1, d2)
+            sns.heatmap(items_df.select_dtypes(include=[np.number]).corr(), annot=True, cmap="coolwarm", ax=ax)
+        show_chart(chart_key, draw)
 
     # ---------------------------------------------------------
     # 7️⃣ PIE CHART — Top Products
     # ---------------------------------------------------------
     elif choice == "🥧 Pie Chart":
         st.subheader("🥧 " + tr("Pie Chart of Top Products"))
-        top_products = items_df.groupby("name")["qty"].sum().head(5)
-        fig, ax = plt.subplots()
-        top_products.plot(kind="pie", autopct="%1.1f%%", ax=ax)
-        ax.set_ylabel("")
-        st.pyplot(fig)
+        top_products = top_sellers.head(5).set_index("name")["qty"]
+        def draw(ax):
+            top_products.plot(kind="pie", autopct="%1.1f%%", ax=ax)
+            ax.set_ylabel("")
+        show_chart(chart_key, draw)
 
     # ---------------------------------------------------------
     # 8️⃣ HISTOGRAM — Price Distribution
     # ---------------------------------------------------------
     elif choice == "📊 Histogram":
         st.subheader("📊 " + tr("Histogram"))
-        fig, ax = plt.subplots()
-        sns.histplot(items_df["price"], kde=True, ax=ax)
-        st.pyplot(fig)
+        def draw(ax):
+            import seaborn as sns
+            sns.histplot(fetch_sale_items(db, d1, d2)["price"], kde=True, ax=ax)
+        show_chart(chart_key, draw)
 
     # ---------------------------------------------------------
     # 9️⃣ BOX PLOT — Price Outliers
     # ---------------------------------------------------------
     elif choice == "📦 Box Plot":
         st.subheader("📦 " + tr("Box Plot"))
-        fig, ax = plt.subplots()
-        sns.boxplot(data=items_df, y="price", ax=ax)
-        st.pyplot(fig)
+        def draw(ax):
+            import seaborn as sns
+            sns.boxplot(data=fetch_sale_items(db, d1, d2), y="price", ax=ax)
+        show_chart(chart_key, draw)
 
     # ---------------------------------------------------------
     # 🔟 AREA CHART
     # ---------------------------------------------------------
     elif choice == "🌄 Area Chart":
         st.subheader("🌄 " + tr("Area Chart"))
-        sales_over_time = filtered_sales.groupby(filtered_sales['date_parsed'].dt.date)['total_amount'].sum()
+        sales_over_time = fetch_daily_sales(db, d1, d2)
         st.area_chart(sales_over_time)
 
     # ---------------------------------------------------------
@@ -1204,49 +768,113 @@ elif page.startswith("📈"):
     elif choice == "⭕ Donut Chart":
         st.subheader("⭕ " + tr("Donut Chart"))
         # Top 5 products for clarity
-        top_products = items_df.groupby("name")["qty"].sum().sort_values(ascending=False).head(5)
-
-        fig, ax = plt.subplots()
-        # Fix: unpack 3 values (wedges, texts, autotexts)
-        wedges, texts, autotexts = ax.pie(
-            top_products,
-            wedgeprops={'width': 0.4},
-            startangle=90,
-            autopct="%1.1f%%"
-        )
-        ax.set_aspect('equal')
-        st.pyplot(fig)
+        top_products = top_sellers.head(5).set_index("name")["qty"]
+
+        def draw(ax):
+            # Fix: unpack 3 values (wedges, texts, autotexts)
+            wedges, texts, autotexts = ax.pie(
+                top_products,
+                wedgeprops={'width': 0.4},
+                startangle=90,
+                autopct="%1.1f%%"
+            )
+            ax.set_aspect('equal')
+        show_chart(chart_key, draw)
 
     # ---------------------------------------------------------
     # 1️⃣2️⃣ BUBBLE CHART
     # ---------------------------------------------------------
     elif choice == "🫧 Bubble Chart":
         st.subheader("🫧 " + tr("Bubble Chart (Qty vs Price with Size = Amount)"))
-        fig, ax = plt.subplots()
-        size = items_df["qty"] * items_df["price"]
-        ax.scatter(items_df["qty"], items_df["price"], s=size/5, alpha=0.5)
-        ax.set_xlabel(tr("Quantity"))
-        ax.set_ylabel(tr("Price"))
-        st.pyplot(fig)
+        def draw(ax):
+            product_sales = fetch_product_sales(db, d1, d2)
+            ax.scatter(product_sales["qty"], product_sales["price"], s=product_sales["amount"]/5, alpha=0.5)
+            ax.set_xlabel(tr("Quantity"))
+            ax.set_ylabel(tr("Price"))
+        show_chart(chart_key, draw)
 
     # ---------------------------------------------------------
     # 1️⃣3️⃣ TREE MAP
     # ---------------------------------------------------------
     elif choice == "🌳 Tree Map":
         st.subheader("🌳 " + tr("Tree Map of Top Products"))
-        top = items_df.groupby("name")["qty"].sum().sort_values(ascending=False).head(10)
-        fig, ax = plt.subplots()
-        squarify.plot(sizes=top.values, label=top.index, alpha=0.8)
-        plt.axis('off')
-        st.pyplot(fig)
+        top = top_sellers.set_index("name")["qty"]
+        def draw(ax):
+            import squarify
+            squarify.plot(sizes=top.values, label=top.index, alpha=0.8, ax=ax)
+            ax.axis('off')
+        show_chart(chart_key, draw)
 
 
 elif page.startswith("🔄"):
     st.title("📥 " + tr("Data Import/Export"))
-    products_df = fetch_products()
-    sales_df = fetch_sales()
-    st.download_button("⬇ products.csv", products_df.to_csv(index=False).encode('utf-8'),"products.csv","text/csv")
-    st.download_button("⬇ sales.csv", sales_df.to_csv(index=False).encode('utf-8'),"sales.csv","text/csv")
+
+    st.markdown("#### Export")
+    table = st.selectbox("Table", list(EXPORT_TABLES))
+    columns = st.multiselect("Columns", list(EXPORT_TABLES[table][0]), default=list(EXPORT_TABLES[table][0]))
+    d1 = d2 = None
+    first_day, last_day = fetch_sales_date_bounds(db)
+    if EXPORT_TABLES[table][2] and first_day is not None:
+        col1, col2 = st.columns(2)
+        d1 = col1.date_input(tr("From"), first_day, key="export_from")
+        d2 = col2.date_input(tr("To"), last_day, key="export_to")
+    export_formats = [fmt for fmt in EXPORT_FORMATS if fmt != "Parquet" or parquet_available()]
+    export_format = st.selectbox("Format", export_formats)
+    extension, mime = EXPORT_FORMATS[export_format]
+    query, params = export_table_query(table, columns, d1, d2)
+    # Deferred: the file is only written when the button is clicked, on the thread serving the download.
+    # Rows are read a chunk at a time, but Streamlit then holds the whole finished file in memory to serve it.
+    st.download_button(
+        f"⬇ {table}.{extension}",
+        lambda: export_query(connection_pool().get(), query, params, export_format, sheet_name=table),
+        f"{table}.{extension}", mime, disabled=not columns
+    )
+    cli_args = f" --columns {' '.join(columns)}" if columns != list(EXPORT_TABLES[table][0]) else ""
+    if d1 is not None and d2 is not None:
+        cli_args += f" --from {d1:%Y-%m-%d} --to {d2:%Y-%m-%d}"
+    st.caption("The download is held in the app's memory while it is served. "
+               "For very large exports, run this on the shop computer instead; it writes straight to a file:")
+    st.code(f"python kirana_cli.py export {table} --format {extension}{cli_args} --out {table}.{extension}", language="bash")
+
+    st.markdown("#### Import Products")
+    st.caption("CSV or Excel with a header row: name, barcode, category, cost_price, sale_price, stock. "
+               "Rows whose barcode already exists update that product.")
+    upload = st.file_uploader("Product file", type=["csv", "xlsx"])
+    add_stock = st.checkbox("Add imported stock to existing stock (instead of replacing it)")
+    if upload is not None and st.button("⬆ Import products"):
+        total_rows = count_rows(upload, upload.name)
+        progress = st.progress(0.0, text="Importing…")
+        def show_progress(result):
+            progress.progress(min(result["rows"] / max(total_rows, 1), 1.0), text=f"{result['rows']:,} / {total_rows:,} rows")
+        try:
+            result = import_products(conn, read_chunks(upload, upload.name), add_stock, show_progress)
+            st.success(f"{result['inserted']:,} products added, {result['updated']:,} updated, {result['rejected']:,} rows rejected.")
+            if result["errors"]:
+                st.warning("\n".join(result["errors"]))
+        except Exception as e:
+            st.error(f"Error importing products: {e}")
+
+    st.markdown("#### Conversion Rates (1 PKR =)")
+    rates_df = st.data_editor(fetch_conversion_rates(db), num_rows="dynamic", hide_index=True, key="conversion_rates")
+    if st.button("💾 Save conversion rates"):
+        rates_df = rates_df.dropna(subset=["currency", "rate"]).fillna({"symbol": ""})
+        c.execute("BEGIN IMMEDIATE")
+        try:
+            c.execute("DELETE FROM conversion_rates")
+            c.executemany(
+                "INSERT INTO conversion_rates (currency,rate,symbol) VALUES (?,?,?)",
+                [(str(row.currency), float(row.rate), str(row.symbol)) for row in rates_df.itertuples(index=False)]
+            )
+            commit()
+            st.success("Conversion rates saved.")
+        except sqlite3.Error as e:
+            conn.rollback()
+            st.error(f"Error saving conversion rates: {e}")
+
+    st.markdown("#### Maintenance")
+    if st.button("🔁 Rebuild sales summaries"):
+        rebuild_daily_sales_summary(db)
+        st.success("Daily and per-product sales summaries rebuilt.")
 
 elif page.startswith("❓"):
     st.title("💬 " + tr("Help"))
@@ -1265,3 +893,4 @@ elif page.startswith("❓"):
 - ❓ {tr('Help')}: `This page`
 """)
 
+end_rerun()
@@ -0,0 +1,461 @@
+# Kirana Pro - UI translations, keyed by English text then by language
+translations = {
+    "Kirana POS": {
+        "English":"Kirana POS", 
+        "Urdu":"کرانہ POS", 
+        "German":"Kirana POS", 
+        "French": "Kirana POS", 
+        "Spanish": "Kirana POS", 
+        "Arabic": "كيران POS"
+    },
+    "Dashboard": {
+        "English":"Dashboard", 
+        "Urdu":"ڈیش بورڈ", 
+        "German":"Dashboard", 
+        "French": "Tableau de bord", 
+        "Spanish": "Tablero", 
+        "Arabic": "لوحة القيادة"
+    },
+    "Inventory": {
+        "English":"Inventory", 
+        "Urdu":"انوینٹری", 
+        "German":"Inventar", 
+        "French": "Inventaire", 
+        "Spanish": "Inventario", 
+        "Arabic": "المخزون"
+    },
+    "Billing / POS": {
+        "English":"Billing / POS", 
+        "Urdu":"بلنگ / POS", 
+        "German":"Abrechnung / POS", 
+        "French": "Facturation / POS", 
+        "Spanish": "Facturación / POS", 
+        "Arabic": "الفوترة / نقطة البيع"
+    },
+    "Sales Report": {
+        "English":"Sales Report", 
+        "Urdu":"سیلز رپورٹ", 
+        "German":"Verkaufsbericht", 
+        "French": "Rapport des ventes", 
+        "Spanish": "Informe de ventas", 
+        "Arabic": "تقرير المبيعات"
+    },
+    "Visualizations": {
+    "English": "Visualizations",
+    "Urdu": "بصری خاکے",
+    "German": "Visualisierungen",
+    "French": "Visualisations",
+    "Spanish": "Visualizaciones",
+    "Arabic": "الرسوم البيانية"
+    },
+    "Select Chart": {
+    "English": "Select Chart",
+    "Urdu": "چارٹ منتخب کریں",
+    "German": "Diagramm auswählen",
+    "French": "Sélectionner un graphique",
+    "Spanish": "Seleccionar gráfico",
+    "Arabic": "اختر المخطط"
+    },
+    "Histogram": {
+    "English": "Histogram",
+    "Urdu": "ہسٹگرام",
+    "German": "Histogramm",
+    "French": "Histogramme",
+    "Spanish": "Histograma",
+    "Arabic": "مدرج تكراري"
+    },
+    "Box Plot": {
+    "English": "Box Plot",
+    "Urdu": "باکس پلاٹ",
+    "German": "Boxplot",
+    "French": "Boîte à moustaches",
+    "Spanish": "Diagrama de caja",
+    "Arabic": "مخطط الصندوق"
+    },
+    "Area Chart": {
+    "English": "Area Chart",
+    "Urdu": "ایریا چارٹ",
+    "German": "Flächendiagramm",
+    "French": "Graphique en aires",
+    "Spanish": "Gráfico de área",
+    "Arabic": "مخطط المساحة"
+    },
+    "Donut Chart": {
+    "English": "Donut Chart",
+    "Urdu": "ڈونٹ چارٹ",
+    "German": "Donut-Diagramm",
+    "French": "Graphique en anneau",
+    "Spanish": "Gráfico de dona",
+    "Arabic": "مخطط الدونات"
+    },
+    "Bubble Chart": {
+    "English": "Bubble Chart",
+    "Urdu": "ببل چارٹ",
+    "German": "Blasendiagramm",
+    "French": "Graphique à bulles",
+    "Spanish": "Gráfico de burbujas",
+    "Arabic": "مخطط الفقاعات"
+    },
+    "Tree Map": {
+    "English": "Tree Map",
+    "Urdu": "ٹری میپ",
+    "German": "Baumkarte",
+    "French": "Carte arborescente",
+    "Spanish": "Mapa de árbol",
+    "Arabic": "خريطة شجرية"
+    },
+    "Bubble Chart (Qty vs Price with Size = Amount)": {
+    "English": "Bubble Chart (Quantity vs Price with Size = Amount)",
+    "Urdu": "ببل چارٹ (مقدار بمقابلہ قیمت، سائز = رقم)",
+    "German": "Blasendiagramm (Menge vs Preis, Größe = Betrag)",
+    "French": "Graphique à bulles (Quantité vs Prix, Taille = Montant)",
+    "Spanish": "Gráfico de burbujas (Cantidad vs Precio, Tamaño = Monto)",
+    "Arabic": "مخطط الفقاعات (الكمية مقابل السعر، الحجم = المبلغ)"
+    },
+    "Donut Chart of Top Products": {
+    "English": "Donut Chart of Top Products",
+    "Urdu": "بہترین مصنوعات کا ڈونٹ چارٹ",
+    "German": "Donut-Diagramm der Top-Produkte",
+    "French": "Graphique en anneau des meilleurs produits",
+    "Spanish": "Gráfico de dona de los productos principales",
+    "Arabic": "مخطط الدونات لأفضل المنتجات"
+    },
+    "Histogram (Price Distribution)": {
+    "English": "Histogram (Price Distribution)",
+    "Urdu": "ہسٹگرام (قیمت کی تقسیم)",
+    "German": "Histogramm (Preisverteilung)",
+    "French": "Histogramme (Répartition des prix)",
+    "Spanish": "Histograma (Distribución de precios)",
+    "Arabic": "مدرج تكراري (توزيع الأسعار)"
+    },
+    "Box Plot (Price Outliers)": {
+    "English": "Box Plot (Price Outliers)",
+    "Urdu": "باکس پلاٹ (قیمت کے آؤٹ لائرز)",
+    "German": "Boxplot (Preis-Ausreißer)",
+    "French": "Boîte à moustaches (Valeurs aberrantes de prix)",
+    "Spanish": "Diagrama de caja (Valores atípicos del precio)",
+    "Arabic": "مخطط الصندوق (القيم الشاذة للسعر)"
+    },
+    "Area Chart (Sales Over Time)": {
+    "English": "Area Chart (Sales Over Time)",
+    "Urdu": "ایریا چارٹ (وقت کے ساتھ فروخت)",
+    "German": "Flächendiagramm (Verkäufe im Zeitverlauf)",
+    "French": "Graphique en aires (Ventes dans le temps)",
+    "Spanish": "Gráfico de área (Ventas a lo largo del tiempo)",
+    "Arabic": "مخطط المساحة (المبيعات بمرور الوقت)"
+    },
+    "Tree Map of Top Products": {
+    "English": "Tree Map of Top Products",
+    "Urdu": "بہترین مصنوعات کی ٹری میپ",
+    "German": "Baumkarte der Top-Produkte",
+    "French": "Carte arborescente des meilleurs produits",
+    "Spanish": "Mapa de árbol de los productos principales",
+    "Arabic": "خريطة شجرية لأفضل المنتجات"
+    },
+    "Top Products (Horizontal Bar Chart)": {
+    "English": "Top Products (Horizontal Bar Chart)",
+    "Urdu": "سب سے بہترین مصنوعات (افقی بار چارٹ)",
+    "German": "Top-Produkte (horizontales Balkendiagramm)",
+    "French": "Meilleurs produits (diagramme à barres horizontal)",
+    "Spanish": "Productos principales (gráfico de barras horizontal)",
+    "Arabic": "أفضل المنتجات (مخطط شريطي أفقي)"
+    },
+    "Scatter Plot (Quantity vs Price)": {
+    "English": "Scatter Plot (Quantity vs Price)",
+    "Urdu": "اسکیٹر پلاٹ (مقدار بمقابلہ قیمت)",
+    "German": "Streudiagramm (Menge vs Preis)",
+    "French": "Diagramme de dispersion (Quantité vs Prix)",
+    "Spanish": "Gráfico de dispersión (Cantidad vs Precio)",
+    "Arabic": "مخطط مبعثر (الكمية مقابل السعر)"
+    },
+
+    "Violin Plot (Price Distribution)": {
+    "English": "Violin Plot (Price Distribution)",
+    "Urdu": "وائلن پلاٹ (قیمت کی تقسیم)",
+    "German": "Violindiagramm (Preisverteilung)",
+    "French": "Graphique en violon (Distribution des prix)",
+    "Spanish": "Gráfico de violín (Distribución de precios)",
+    "Arabic": "مخطط الكمان (توزيع الأسعار)"
+    },
+    "Correlation Heatmap": {
+    "English": "Correlation Heatmap",
+    "Urdu": "تعلقات کی ہیٹ میپ",
+    "German": "Korrelations-Heatmap",
+    "French": "Carte thermique des corrélations",
+    "Spanish": "Mapa de calor de correlación",
+    "Arabic": "خريطة الحرارة للترابط"
+    },
+
+    "Pie Chart of Top Products": {
+    "English": "Pie Chart of Top Products",
+    "Urdu": "بہترین مصنوعات کا پائی چارٹ",
+    "German": "Kreisdiagramm der Top-Produkte",
+    "French": "Diagramme circulaire des meilleurs produits",
+    "Spanish": "Gráfico circular de los productos principales",
+    "Arabic": "مخطط دائري لأفضل المنتجات"
+    },
+    "Quantity": {
+    "English": "Quantity",
+    "Urdu": "مقدار",
+    "German": "Menge",
+    "French": "Quantité",
+    "Spanish": "Cantidad",
+    "Arabic": "الكمية"
+    },
+    "Price": {
+    "English": "Price",
+    "Urdu": "قیمت",
+    "German": "Preis",
+    "French": "Prix",
+    "Spanish": "Precio",
+    "Arabic": "السعر"
+    },
+    "WelcomeTitle": {
+    "English": "✨ Welcome to Kirana Pro",
+    "Urdu": "✨ Kirana Pro میں خوش آمدید",
+    "German": "✨ Willkommen bei Kirana Pro",
+    "French": "✨ Bienvenue sur Kirana Pro",
+    "Spanish": "✨ Bienvenido a Kirana Pro",
+    "Arabic": "✨ مرحبًا بك في Kirana Pro"
+    },
+    "No sales data to visualize.": {
+    "English": "No sales data to visualize.",
+    "Urdu": "کوئی سیل ڈیٹا موجود نہیں ہے۔",
+    "German": "Keine Verkaufsdaten zur Visualisierung.",
+    "French": "Aucune donnée de vente à visualiser.",
+    "Spanish": "No hay datos de ventas para visualizar.",
+    "Arabic": "لا توجد بيانات مبيعات للعرض."
+    },
+    "From": {
+    "English": "From",
+    "Urdu": "سے",
+    "German": "Von",
+    "French": "De",
+    "Spanish": "Desde",
+    "Arabic": "من"
+    },
+    "To": {
+    "English": "To",
+    "Urdu": "تک",
+    "German": "À",
+    "French": "À",
+    "Spanish": "Hasta",
+    "Arabic": "إلى"
+    },
+    "Sales Over Time": {
+    "English": "Sales Over Time",
+    "Urdu": "وقت کے ساتھ فروخت",
+    "German": "Verkäufe im Zeitverlauf",
+    "French": "Ventes au fil du temps",
+    "Spanish": "Ventas a lo largo del tiempo",
+    "Arabic": "المبيعات حسب الوقت"
+    },
+    "Top Selling Products": {
+    "English": "Top Selling Products",
+    "Urdu": "زیادہ فروخت ہونے والی مصنوعات",
+    "German": "Meistverkaufte Produkte",
+    "French": "Produits les plus vendus",
+    "Spanish": "Productos más vendidos",
+    "Arabic": "أفضل المنتجات مبيعًا"
+    },
+    "Could not parse items_json": {
+    "English": "Could not parse items_json",
+    "Urdu": "آئٹمز JSON کو پڑھا نہیں جا سکا",
+    "German": "items_json konnte nicht verarbeitet werden",
+    "French": "Impossible d'analyser items_json",
+    "Spanish": "No se pudo analizar items_json",
+    "Arabic": "تعذر解析 items_json"
+    },
+    "No product data found.": {
+    "English": "No product data found.",
+    "Urdu": "کوئی پراڈکٹ ڈیٹا نہیں ملا۔",
+    "German": "Keine Produktdaten gefunden.",
+    "French": "Aucune donnée produit trouvée.",
+    "Spanish": "No se encontraron datos de productos.",
+    "Arabic": "لم يتم العثور على بيانات المنتجات."
+    },
+    "Data Import/Export": {
+        "English":"Data Import/Export", 
+        "Urdu":"ڈیٹا درآمد/برآمد", 
+        "German":"Daten Import/Export", 
+        "French": "Import/Export de données", 
+        "Spanish": "Importación/Exportación de datos", 
+        "Arabic": "استيراد/تصدير البيانات"
+    },
+    "Help": {
+        "English":"Help", 
+        "Urdu":"مدد", 
+        "German":"Hilfe", 
+        "French": "Aide", 
+        "Spanish": "Ayuda", 
+        "Arabic": "مساعدة"
+    },
+    "Add Product": {
+        "English":"Add Product ➕", 
+        "Urdu":"مصنوعات شامل کریں ➕", 
+        "German":"Produkt hinzufügen ➕", 
+        "French": "Ajouter un produit ➕", 
+        "Spanish": "Agregar producto ➕", 
+        "Arabic": "أضف منتج ➕"
+    },
+    "Customer Name": {
+        "English":"Customer name (optional)", 
+        "Urdu":"صارف کا نام (اختیاری)", 
+        "German":"Kundenname (optional)", 
+        "French": "Nom du client (optionnel)", 
+        "Spanish": "Nombre del cliente (opcional)", 
+        "Arabic": "اسم العميل (اختياري)"
+    },
+    "Payment Method": {
+        "English":"Payment method", 
+        "Urdu":"ادائیگی کا طریقہ", 
+        "German":"Zahlungsmethode", 
+        "French": "Mode de paiement", 
+        "Spanish": "Método de pago", 
+        "Arabic": "طريقة الدفع"
+    },
+    "Notes": {
+        "English":"Notes (optional)", 
+        "Urdu":"نوٹس (اختیاری)", 
+        "German":"Notizen (optional)", 
+        "French": "Notes (optionnel)", 
+        "Spanish": "Notas (opcional)", 
+        "Arabic": "ملاحظات (اختياري)"
+    },
+    "Stock": {
+        "English":"Stock", 
+        "Urdu":"اسٹاک", 
+        "German":"Bestand", 
+        "French": "Stock", 
+        "Spanish": "Inventario", 
+        "Arabic": "المخزون"
+    },
+    "Total Sales": {
+        "English":"Total Sales", 
+        "Urdu":"کل فروخت", 
+        "German":"Gesamtverkauf", 
+        "French": "Ventes totales", 
+        "Spanish": "Ventas totales", 
+        "Arabic": "إجمالي المبيعات"
+    },
+    "Cart": {
+        "English":"Cart", 
+        "Urdu":"کارٹ", 
+        "German":"Warenkorb", 
+        "French": "Panier", 
+        "Spanish": "Carrito", 
+        "Arabic": "عربة التسوق"
+    },
+    "Complete Sale": {
+        "English":"Complete Sale ✅", 
+        "Urdu":"سیل مکمل کریں ✅", 
+        "German":"Verkauf abschließen ✅", 
+        "French": "Vente terminée ✅", 
+        "Spanish": "Venta completada ✅", 
+        "Arabic": "اكتمال البيع ✅"
+    },
+    "Search Product": {
+        "English":"Search product name or barcode", 
+        "Urdu":"مصنوعات کا نام یا بارکوڈ تلاش کریں", 
+        "German":"Produktname oder Barcode suchen", 
+        "French": "Rechercher produit ou code-barres", 
+        "Spanish": "Buscar producto o código", 
+        "Arabic": "ابحث عن المنتج أو الباركود"
+    },
+    "Delete Product": {
+        "English":"Delete", 
+        "Urdu":"حذف کریں", 
+        "German":"Löschen", 
+        "French": "Supprimer", 
+        "Spanish": "Eliminar", 
+        "Arabic": "حذف"
+    },
+    "No Products": {
+        "English":"No products in inventory.", 
+        "Urdu":"انوینٹری میں کوئی مصنوعات نہیں۔", 
+        "German":"Keine Produkte im Inventar.", 
+        "French": "Aucun produit en stock.", 
+        "Spanish": "No hay productos en inventario.", 
+        "Arabic": "لا توجد منتجات في المخزون."
+    },
+    "No Sales": {
+        "English":"No sales yet.", 
+        "Urdu":"ابھی تک کوئی فروخت نہیں ہوئی۔", 
+        "German":"Noch keine Verkäufe.", 
+        "French": "Aucune vente pour le moment.", 
+        "Spanish": "No hay ventas todavía.", 
+        "Arabic": "لا توجد مبيعات حتى الآن."
+    },
+    "Low Stock Threshold": {
+        "English":"Low stock threshold", 
+        "Urdu":"کم اسٹاک حد", 
+        "German":"Niedriges Bestandslimit", 
+        "French": "Seuil de stock faible", 
+        "Spanish": "Umbral de stock bajo", 
+        "Arabic": "حد المخزون المنخفض"
+    },
+    "Cart Empty": {
+        "English":"Cart is empty. Add products from left.", 
+        "Urdu":"کارٹ خالی ہے۔ بائیں جانب سے مصنوعات شامل کریں۔", 
+        "German":"Warenkorb ist leer. Produkte von links hinzufügen.", 
+        "French": "Le panier est vide. Ajoutez des produits à gauche.", 
+        "Spanish": "El carrito está vacío. Agregue productos desde la izquierda.", 
+        "Arabic": "السلة فارغة. أضف المنتجات من اليسار."
+    },
+    "Subtotal": {
+        "English":"Subtotal", 
+        "Urdu":"ذیلی کل", 
+        "German":"Zwischensumme", 
+        "French": "Sous-total", 
+        "Spanish": "Subtotal", 
+        "Arabic": "المجموع الجزئي"
+    },
+    "Discount": {
+        "English":"Discount", 
+        "Urdu":"رعایت", 
+        "German":"Rabatt", 
+        "French": "Remise", 
+        "Spanish": "Descuento", 
+        "Arabic": "خصم"
+    },
+    "Total": {
+        "English":"Total", 
+        "Urdu":"کل", 
+        "German":"Gesamt", 
+        "French": "Total", 
+        "Spanish": "Total", 
+        "Arabic": "الإجمالي"
+    },
+    "Notes Label": {
+        "English":"Notes", 
+        "Urdu":"نوٹس", 
+        "German":"Notizen", 
+        "French": "Notes", 
+        "Spanish": "Notas", 
+        "Arabic": "ملاحظات"
+    },
+    "Download Invoice PDF": {
+        "English":"⬇ Download Invoice (PDF)", 
+        "Urdu":"⬇ انوائس ڈاؤن لوڈ کریں (PDF)", 
+        "German":"⬇ Rechnung herunterladen (PDF)", 
+        "French": "⬇ Télécharger la facture (PDF)", 
+        "Spanish": "⬇ Descargar factura (PDF)", 
+        "Arabic": "⬇ تحميل الفاتورة (PDF)"
+    },
+    "Download Invoice HTML": {
+        "English":"⬇ Download Invoice (HTML)", 
+        "Urdu":"⬇ انوائس ڈاؤن لوڈ کریں (HTML)", 
+        "German":"⬇ Rechnung herunterladen (HTML)", 
+        "French": "⬇ Télécharger la facture (HTML)", 
+        "Spanish": "⬇ Descargar factura (HTML)", 
+        "Arabic": "⬇ تحميل الفاتورة (HTML)"
+    },
+    "Download Items CSV": {
+        "English":"⬇ Download Items CSV", 
+        "Urdu":"⬇ اشیاء CSV ڈاؤن لوڈ کریں", 
+        "German":"⬇ Artikel CSV herunterladen", 
+        "French": "⬇ Télécharger les articles CSV", 
+        "Spanish": "⬇ Descargar artículos CSV", 
+        "Arabic": "⬇ تحميل العناصر CSV"
+    },
+}